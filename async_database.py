@@ -0,0 +1,120 @@
+# async_database.py
+# Runs the functions of database.py off the event loop.
+# A single writer thread takes work from a queue, while a small pool of read-only connections serves queries.
+# Python libraries
+import time
+import queue
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Local modules
+import config
+import metrics
+import database
+
+WRITE_QUEUE = queue.Queue()
+WRITER = None
+READERS = None
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+def open_connection(filename, read_only=False) -> sqlite3.Connection:
+    """Opens a connection tuned for concurrent access under WAL journaling."""
+    if (read_only):
+        connection = sqlite3.connect(f"file:{filename}?mode=ro", uri=True)
+    else:
+        connection = sqlite3.connect(filename)
+        connection.execute("PRAGMA journal_mode = WAL;")
+    synchronous = config.DB_SYNCHRONOUS.upper() if config.DB_SYNCHRONOUS.upper() in SYNCHRONOUS_LEVELS else 'NORMAL'
+    connection.execute(f"PRAGMA synchronous = {synchronous};")
+    connection.execute("PRAGMA busy_timeout = 5000;")
+    return connection
+
+def record(kind, elapsed) -> None:
+    """Adds the latency of a finished query to the metrics."""
+    metrics.observe('db_statement_seconds', elapsed, kind=kind)
+
+def resolve(future, result, exception) -> None:
+    """Completes a future from the event loop's thread."""
+    if (future.cancelled()):
+        return
+    if (exception is not None):
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+def writer_loop(filename) -> None:
+    """Executes queued writes one at a time on the only connection allowed to write."""
+    database.LOCAL.connection = open_connection(filename)
+    while (True):
+        work = WRITE_QUEUE.get()
+        if (work is None):
+            break
+        loop, future, function, args = work
+        start = time.perf_counter()
+        result, exception = None, None
+        try:
+            result = function(*args)
+        except Exception as e:
+            exception = e
+        record('write', time.perf_counter() - start)
+        loop.call_soon_threadsafe(resolve, future, result, exception)
+    database.LOCAL.connection.close()
+
+def init_reader(filename) -> None:
+    """Opens the read-only connection of a reader thread."""
+    database.LOCAL.connection = open_connection(filename, read_only=True)
+
+def timed_read(function, args):
+    start = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        record('read', time.perf_counter() - start)
+
+async def write(function, *args):
+    """Runs a database.py function on the writer thread and waits for its result."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    WRITE_QUEUE.put((loop, future, function, args))
+    depth = WRITE_QUEUE.qsize()
+    metrics.set_gauge('db_write_queue_depth', depth)
+    metrics.raise_gauge('db_write_queue_depth_max', depth)
+    try:
+        return await future
+    finally:
+        metrics.set_gauge('db_write_queue_depth', WRITE_QUEUE.qsize())
+
+async def read(function, *args):
+    """Runs a read-only database.py function on one of the reader connections."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(READERS, timed_read, function, args)
+
+async def start(filename=database.FILENAME) -> None:
+    """Starts the writer and reader threads, applying pending migrations first and raising if one fails."""
+    global WRITER, READERS
+    if (WRITER is not None and WRITER.is_alive()):
+        return
+    WRITER = threading.Thread(target=writer_loop, args=(filename,), name="database-writer", daemon=True)
+    WRITER.start()
+    try:
+        await write(database.migrate)
+    except Exception:
+        WRITE_QUEUE.put(None) # Stops the writer, so the migrations are tried again on the next start
+        await asyncio.to_thread(WRITER.join)
+        WRITER = None
+        raise
+    READERS = ThreadPoolExecutor(
+        max_workers=config.DB_READERS, thread_name_prefix="database-reader",
+        initializer=init_reader, initargs=(filename,))
+
+async def stop() -> None:
+    """Finishes the queued writes and closes every connection."""
+    global WRITER, READERS
+    if (WRITER is None):
+        return
+    WRITE_QUEUE.put(None)
+    await asyncio.to_thread(WRITER.join)
+    READERS.shutdown(wait=True)
+    WRITER, READERS = None, None
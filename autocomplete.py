@@ -0,0 +1,159 @@
+# autocomplete.py
+# In-memory index answering the channel arguments' autocomplete without querying the database.
+# Each server has its own index of the channels it follows, identified by their target ids.
+# Python libraries
+import bisect
+import itertools
+
+CHOICE_LIMIT = 25 # Choices accepted by Discord
+SCAN_LIMIT = 1000 # Names looked at per search phase when excluding, bounding the work for users subscribed to most channels
+
+INDEXES = {}        # Guild id -> NameIndex
+GUILD_OF = {}       # Target id -> guild id
+SUBSCRIPTIONS = {}  # User id -> set of subscribed target ids
+USER_INDEXES = {}   # (guild id, user id) -> NameIndex of the channels the user is subscribed to in that server
+
+class NameIndex:
+    """Channel names of a server, searched by prefix and substring."""
+
+    def __init__(self):
+        self.names = []     # Sorted (lowercase name, id) pairs
+        self.by_id = {}     # Target id -> name as registered
+        self.text = ""      # Every lowercase name joined by newlines, so substrings are found with str.find
+        self.starts = []    # Offset in text where each name of names starts
+
+    def build_text(self) -> None:
+        """Joins the sorted names into the text searched for substrings. Rebuilt whenever channels change."""
+        names = [name for name, _ in self.names]
+        self.starts = list(itertools.accumulate((len(name) + 1 for name in names[:-1]), initial=0)) if len(names) > 0 else []
+        self.text = "\n".join(names)
+
+    def add(self, target_id, name, build=True) -> None:
+        if (target_id in self.by_id):
+            return
+        self.by_id[target_id] = name
+        bisect.insort(self.names, (name.lower(), target_id))
+        if (build):
+            self.build_text()
+
+    def remove(self, target_id) -> None:
+        name = self.by_id.pop(target_id, None)
+        if (name is None):
+            return
+        index = bisect.bisect_left(self.names, (name.lower(), target_id))
+        if (index < len(self.names) and self.names[index][1] == target_id):
+            del self.names[index]
+            self.build_text()
+
+    def search(self, current, exclude=None, limit=CHOICE_LIMIT) -> [(int, str)]:
+        """
+        Returns up to limit (id, name) channels whose name contains current, ignoring case.
+        exclude leaves a set of ids out, looking at no more than SCAN_LIMIT names per phase.
+        """
+        current = current.lower().replace("\n", "")
+        exclude = exclude or set()
+        budget = SCAN_LIMIT if len(exclude) > 0 else len(self.names)
+        # Prefix matches come from a binary search over the sorted names
+        matches = []
+        index = bisect.bisect_left(self.names, (current,))
+        end = min(index + budget, len(self.names))
+        while (index < end and self.names[index][0].startswith(current) and len(matches) < limit):
+            if (self.names[index][1] not in exclude):
+                matches.append(self.names[index])
+            index += 1
+        # Substring matches fill the remaining choices
+        if (len(matches) < limit and len(current) > 0):
+            budget = SCAN_LIMIT if len(exclude) > 0 else len(self.names)
+            position = self.text.find(current)
+            while (position >= 0 and len(matches) < limit and budget > 0):
+                budget -= 1
+                index = bisect.bisect_right(self.starts, position) - 1
+                name, target_id = self.names[index]
+                if (not name.startswith(current) and target_id not in exclude):
+                    matches.append((name, target_id))
+                next_start = self.starts[index + 1] if index + 1 < len(self.starts) else len(self.text)
+                position = self.text.find(current, next_start)
+        return [(target_id, self.by_id[target_id]) for _, target_id in rank(matches, current)]
+
+def load(target_rows, subscription_rows) -> None:
+    """Builds the indexes from (target_id, name, guild) rows and (user_id, target_id) subscription rows."""
+    INDEXES.clear()
+    GUILD_OF.clear()
+    SUBSCRIPTIONS.clear()
+    for target_id, name, guild in target_rows:
+        INDEXES.setdefault(guild, NameIndex()).add(target_id, name, build=False)
+        GUILD_OF[target_id] = guild
+    for index in INDEXES.values():
+        index.build_text()
+    USER_INDEXES.clear()
+    for user_id, target_id in subscription_rows:
+        SUBSCRIPTIONS.setdefault(user_id, set()).add(target_id)
+        if (target_id in GUILD_OF):
+            user_index(user_id, target_id, create=True).add(target_id, INDEXES[GUILD_OF[target_id]].by_id[target_id], build=False)
+    for index in USER_INDEXES.values():
+        index.build_text()
+
+def user_index(user_id, target_id, create=False) -> NameIndex:
+    """Gets the index of a user's subscriptions in the server of a target."""
+    key = (GUILD_OF.get(target_id), user_id)
+    if (create and key not in USER_INDEXES):
+        USER_INDEXES[key] = NameIndex()
+    return USER_INDEXES.get(key)
+
+def add_channel(target_id, name, guild, build=True) -> None:
+    """Adds a target to its server's index. Adding many at once, build is False until the last is added."""
+    INDEXES.setdefault(guild, NameIndex()).add(target_id, name, build)
+    GUILD_OF[target_id] = guild
+
+def build_guild(guild) -> None:
+    """Rebuilds the searched text of a server's index, after channels were added without building it."""
+    if (guild in INDEXES):
+        INDEXES[guild].build_text()
+
+def remove_channel(target_id) -> None:
+    guild = GUILD_OF.get(target_id)
+    for user_id, targets in SUBSCRIPTIONS.items():
+        if (target_id in targets):
+            targets.discard(target_id)
+            unindex_subscription(user_id, target_id)
+    GUILD_OF.pop(target_id, None)
+    if (guild in INDEXES):
+        INDEXES[guild].remove(target_id)
+
+def subscribe(user_id, target_id) -> None:
+    SUBSCRIPTIONS.setdefault(user_id, set()).add(target_id)
+    if (target_id in GUILD_OF):
+        user_index(user_id, target_id, create=True).add(target_id, INDEXES[GUILD_OF[target_id]].by_id[target_id])
+
+def unsubscribe(user_id, target_id) -> None:
+    SUBSCRIPTIONS.get(user_id, set()).discard(target_id)
+    unindex_subscription(user_id, target_id)
+
+def unindex_subscription(user_id, target_id) -> None:
+    index = user_index(user_id, target_id)
+    if (index is not None):
+        index.remove(target_id)
+        if (len(index.by_id) < 1):
+            del USER_INDEXES[(GUILD_OF.get(target_id), user_id)]
+
+def rank(matches, current) -> list:
+    """Orders matches: exact name first, then names starting with current, then by where current appears."""
+    return sorted(matches, key=lambda match: (match[0] != current, match[0].find(current), match[0]))
+
+def search(guild, current, exclude=None, limit=CHOICE_LIMIT) -> [(int, str)]:
+    """Returns up to limit (id, name) channels of a server whose name contains current, ignoring case."""
+    index = INDEXES.get(guild)
+    if (index is None):
+        return []
+    return index.search(current, exclude, limit)
+
+def subscribed(guild, user_id, current) -> [(int, str)]:
+    """Channels of a server a user is subscribed to, matching current, searched in the user's own index."""
+    index = USER_INDEXES.get((guild, user_id))
+    if (index is None):
+        return []
+    return index.search(current)
+
+def unsubscribed(guild, user_id, current) -> [(int, str)]:
+    """Channels of a server a user isn't subscribed to, matching current."""
+    return search(guild, current, exclude=SUBSCRIPTIONS.get(user_id, set()))
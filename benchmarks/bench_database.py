@@ -0,0 +1,60 @@
+# benchmarks/bench_database.py
+# Compares the subscriber queries before and after the indexed, parameterized schema.
+# Usage: python -m benchmarks.bench_database [--subscribers N] [--channels N] [--runs N]
+# Python libraries
+import os
+import time
+import random
+import argparse
+import tempfile
+
+# Local modules
+import database
+from benchmarks.seed import seed
+
+def legacy_get_subs(conn, id) -> list:
+    return [sub[1] for sub in conn.execute(f"SELECT * FROM subscribers WHERE channel_id = {id};").fetchall()]
+
+def legacy_get_subd(conn, user_id) -> list:
+    channel_ids = [row[0] for row in conn.execute(f"SELECT channel_id FROM subscribers WHERE user_id = {user_id};").fetchall()]
+    if (len(channel_ids) < 1):
+        return None
+    id_string = ", ".join(str(id) for id in channel_ids)
+    return conn.execute(f"SELECT id, name FROM channels WHERE id IN ({id_string});").fetchall()
+
+def legacy_get_unsubd(conn, user_id) -> list:
+    channel_ids = [row[0] for row in conn.execute(f"SELECT channel_id FROM subscribers WHERE user_id = {user_id};").fetchall()]
+    id_string = ", ".join(str(id) for id in channel_ids)
+    return conn.execute(f"SELECT id, name FROM channels WHERE id NOT IN ({id_string});").fetchall()
+
+def timed(function, arguments) -> float:
+    """Mean milliseconds of a function over a list of arguments."""
+    start = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - start) * 1000 / len(arguments)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the subscriber queries.')
+    parser.add_argument('--subscribers', type=int, default=100000)
+    parser.add_argument('--channels', type=int, default=1000)
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+    users = max(args.subscribers // 20, 1)
+    channel_ids = [random.randrange(1, args.channels + 1) for _ in range(args.runs)]
+    user_ids = [random.randrange(users) for _ in range(args.runs)]
+    with tempfile.TemporaryDirectory() as folder:
+        legacy = seed(os.path.join(folder, 'legacy.db'), args.channels, args.subscribers, migrated=False)
+        seed(os.path.join(folder, 'migrated.db'), args.channels, args.subscribers, migrated=True)
+        print(f"{args.subscribers} subscribers, {args.channels} channels, mean ms per query")
+        print(f"{'query':<12}{'legacy':>10}{'migrated':>10}")
+        for name, old, new, arguments in (
+                ('get_subs', lambda id: legacy_get_subs(legacy, id), database.get_subs, channel_ids),
+                ('get_subd', lambda id: legacy_get_subd(legacy, id), database.get_subd, user_ids),
+                ('get_unsubd', lambda id: legacy_get_unsubd(legacy, id), database.get_unsubd, user_ids)):
+            print(f"{name:<12}{timed(old, arguments):>10.3f}{timed(new, arguments):>10.3f}")
+        legacy.close()
+        database.CONNECTION.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+# benchmarks/bench_load.py
+# Load test of a full polling cycle against local stand-ins for YouTube, Twitch and Discord.
+# Usage: python -m benchmarks.bench_load [--sizes 100 1000 10000] [--server URL] [--latency MS] ...
+# Python libraries
+import os
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+
+# Local modules
+import bot
+import config
+import metrics
+import poller
+import monitor
+import fanout
+import notifier
+import channel_store
+import target_store
+import twitch_helix
+import async_database
+import response_cache
+import transitions
+from benchmarks.seed import seed
+from benchmarks.fake_discord import FakeBot
+from benchmarks import stub_server, mock_helix
+
+def counter_ratio(name, other, total=True) -> float:
+    """Percentage of a counter summed over platforms, relative to another (total=True) or to both of them."""
+    count = sum(value for (counter, _), value in metrics.COUNTERS.items() if counter == name)
+    other_count = sum(value for (counter, _), value in metrics.COUNTERS.items() if counter == other)
+    whole = other_count if total else count + other_count
+    return count * 100 / whole if whole > 0 else 0.0
+
+def database_ms() -> float:
+    """Milliseconds spent in database reads and writes so far."""
+    return sum(metrics.get_histogram('db_statement_seconds', kind=kind).sum for kind in ('read', 'write')) * 1000
+
+def percentile(values, fraction) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if len(ordered) > 0 else 0.0
+
+async def run_cycle(channels, subscribers_per_channel, cycles=1, guilds=1) -> dict:
+    """
+    Seeds a database with the given number of channels and checks all of them in one or more cycles.
+    Reports the last cycle, so later ones show the effect of the response cache.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, 'livestreams.db')
+        seed(filename, channels, channels * subscribers_per_channel, guilds=guilds).close()
+        await async_database.start(filename)
+        await channel_store.load()
+        await target_store.load()
+        fanout.MENTIONS.clear()
+        fake_bot = FakeBot()
+        if (notifier.TASK is not None):
+            notifier.TASK.cancel()
+        notifier.TASK = None
+        notifier.start(fake_bot)
+        monitor.ON_CHANGE = bot.on_channel_change
+        response_cache.VALIDATORS.entries.clear()
+        response_cache.FINGERPRINTS.entries.clear()
+        transitions.STATES.clear() # Channel names repeat between sizes
+        metrics.COUNTERS.clear()
+
+        latencies = []
+        failures = 0
+        async def timed_check(platform, name):
+            nonlocal failures
+            start = time.perf_counter()
+            try:
+                await monitor.CHECKS[platform](name)
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+        async def timed_batch(keys):
+            start = time.perf_counter()
+            await monitor.check_twitch_batch(keys)
+            latencies.extend([time.perf_counter() - start] * len(keys))
+
+        rows = channel_store.get_channels()
+        for cycle in range(cycles):
+            latencies.clear()
+            failures = 0
+            before = database_ms()
+            if (twitch_helix.enabled()):
+                twitch = [(row[2], row[1]) for row in rows if row[2] == "Twitch"]
+                checks = [timed_check(row[2], row[1]) for row in rows if row[2] != "Twitch"]
+                checks += [timed_batch(twitch[index:index + twitch_helix.BATCH_SIZE])
+                           for index in range(0, len(twitch), twitch_helix.BATCH_SIZE)]
+            else:
+                checks = [timed_check(row[2], row[1]) for row in rows]
+            duration = await poller.run_cycle(checks)
+            await channel_store.flush()
+        await asyncio.sleep(config.NOTIFY_BATCH_DELAY + 0.5) # Let the dispatcher send what it can
+        after = database_ms()
+        await async_database.stop()
+    return {
+        'channels': channels,
+        'cycle_s': duration,
+        'checks_per_s': channels / duration if duration > 0 else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'failures': failures,
+        'db_ms': after - before,
+        'sent': fake_bot.sent_messages(),
+        'queued': notifier.queue_size(),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'not_modified': counter_ratio('not_modified', 'conditional_requests'),
+        'unchanged': counter_ratio('results_unchanged', 'results_changed', total=False)}
+
+async def main(args):
+    runner = None
+    base_url = args.server
+    if (base_url is None):
+        platforms = stub_server.StubPlatforms(
+            args.page_size, args.latency / 1000, args.jitter / 1000,
+            args.live_ratio, args.malformed_ratio, args.error_ratio)
+        runner, base_url = await stub_server.start(platforms)
+    config.YOUTUBE_URL = f"{base_url}/yt"
+    config.TWITCH_URL = f"{base_url}/tw"
+    config.LIVE_CONFIRMATIONS = 1 # A single cycle is measured, so transitions are notified on their first sample
+    helix_runner = None
+    if (args.helix):
+        helix = mock_helix.MockHelix(args.live_ratio)
+        helix_runner, helix_url = await mock_helix.start(helix)
+        config.TWITCH_CLIENT_ID, config.TWITCH_CLIENT_SECRET = mock_helix.CLIENT_ID, mock_helix.CLIENT_SECRET
+        config.TWITCH_API_URL, config.TWITCH_AUTH_URL = f"{helix_url}/helix", f"{helix_url}/oauth2/token"
+    print(f"{'channels':>9}{'cycle s':>9}{'checks/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'failed':>8}"
+          f"{'DB ms':>9}{'sent':>7}{'queued':>8}{'RSS MB':>8}{'304 %':>7}{'same %':>8}")
+    try:
+        for size in args.sizes:
+            result = await run_cycle(size, args.subscribers, args.cycles, args.guilds)
+            print(f"{result['channels']:>9}{result['cycle_s']:>9.2f}{result['checks_per_s']:>10.1f}"
+                  f"{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['failures']:>8}"
+                  f"{result['db_ms']:>9.1f}{result['sent']:>7}{result['queued']:>8}{result['peak_rss_mb']:>8.1f}"
+                  f"{result['not_modified']:>7.0f}{result['unchanged']:>8.0f}")
+    finally:
+        await poller.close_session()
+        if (runner is not None):
+            await runner.cleanup()
+        if (helix_runner is not None):
+            print(f"Helix: {helix.stream_requests} streams request(s), {helix.token_requests} token request(s)")
+            await helix_runner.cleanup()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test a polling cycle against local stand-ins.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--subscribers', type=int, default=5, help="Subscriptions per channel")
+    parser.add_argument('--guilds', type=int, default=1, help="Servers following every channel, each one notified")
+    parser.add_argument('--cycles', type=int, default=1, help="Cycles run per size, the last one being reported")
+    parser.add_argument('--server', help="Base url of an already running benchmarks.stub_server")
+    parser.add_argument('--page-size', type=int, default=256 * 1024)
+    parser.add_argument('--latency', type=float, default=50, help="Milliseconds before the stand-in answers")
+    parser.add_argument('--jitter', type=float, default=20)
+    parser.add_argument('--live-ratio', type=float, default=0.1)
+    parser.add_argument('--malformed-ratio', type=float, default=0.01)
+    parser.add_argument('--error-ratio', type=float, default=0.01)
+    parser.add_argument('--helix', action='store_true', help="Check Twitch channels through a mock Helix API")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,77 @@
+# benchmarks/bench_scanner.py
+# Compares the streaming page scanner against the former split-based parsing.
+# Usage: python -m benchmarks.bench_scanner [--runs N]
+# Python libraries
+import time
+import argparse
+import tracemalloc
+
+# Local modules
+from scanner import YouTubeScanner, TwitchScanner, CHUNK_SIZE
+from benchmarks.pages import load_page, fixture_names
+
+def split_parse_YT(body) -> (str, bool):
+    """Former parsing of a YouTube page, kept as the benchmark baseline."""
+    content = body.decode('utf8')
+    title = content.split('<title>')[1].split('</title>')[0]
+    aux = content.split('<link rel="canonical" href="https://www.youtube.com/')
+    aux = aux[1].split('>')[0].split('?') if len(aux) > 0 else []
+    is_livestream = aux.count('watch') > 0
+    is_live = content.split('"status":"', maxsplit=2)[1].split('"', maxsplit=2)[0] == 'OK' if is_livestream else False
+    return title, is_live
+
+def split_parse_TW(body) -> (str, bool):
+    """Former parsing of a Twitch page, kept as the benchmark baseline."""
+    content = body.decode('utf8')
+    is_live = content.find('"isLiveBroadcast":true') > 0
+    title = content.split('"VideoObject","description":"')[1].split('"')[0] if is_live else ""
+    return title, is_live
+
+def stream_parse(body, scanner) -> (str, bool, int):
+    """Feeds the page in network-sized chunks, stopping as soon as the scanner is done."""
+    for offset in range(0, len(body), CHUNK_SIZE):
+        scanner.feed(body[offset:offset + CHUNK_SIZE])
+        if (scanner.done()):
+            break
+    scanner.finish()
+    title, is_live = scanner.result()
+    return title, is_live, scanner.bytes_read
+
+def measure(function, runs) -> (float, int):
+    """Returns the mean time in milliseconds and the peak traced memory in bytes of a function."""
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    elapsed = (time.perf_counter() - start) * 1000 / runs
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the streaming page scanner.')
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+    print(f"{'fixture':<18}{'method':<8}{'result':<12}{'ms':>9}{'peak KiB':>11}{'read KiB':>11}")
+    for name in fixture_names():
+        body = load_page(name)
+        is_youtube = name.startswith('youtube')
+        split_parse = split_parse_YT if is_youtube else split_parse_TW
+        new_scanner = YouTubeScanner if is_youtube else TwitchScanner
+        # The former parser raises on pages lacking a marker, so it only runs where it can
+        try:
+            expected = split_parse(body)
+        except IndexError:
+            expected = None
+        title, is_live, bytes_read = stream_parse(body, new_scanner())
+        if (expected is not None and expected != (title, is_live)):
+            print(f"{name}: results differ {expected} != {(title, is_live)}")
+        if (expected is not None):
+            elapsed, peak = measure(lambda: split_parse(body), args.runs)
+            print(f"{name:<18}{'split':<8}{str(expected[1]):<12}{elapsed:>9.3f}{peak / 1024:>11.0f}{len(body) / 1024:>11.0f}")
+        elapsed, peak = measure(lambda: stream_parse(body, new_scanner()), args.runs)
+        print(f"{name:<18}{'stream':<8}{str(is_live):<12}{elapsed:>9.3f}{peak / 1024:>11.0f}{bytes_read / 1024:>11.0f}")
+
+if __name__ == '__main__':
+    main()
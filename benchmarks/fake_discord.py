@@ -0,0 +1,37 @@
+# benchmarks/fake_discord.py
+# Stand-ins for the Discord client and text channels, recording what the bot sends.
+# Python libraries
+import asyncio
+
+class FakeChannel:
+    """Text channel recording sent messages, optionally taking some time per send."""
+
+    def __init__(self, channel_id, latency=0.0):
+        self.id = channel_id
+        self.latency = latency
+        self.messages = []
+
+    async def send(self, content, **kwargs) -> None:
+        if (self.latency > 0):
+            await asyncio.sleep(self.latency)
+        self.messages.append(content)
+
+class FakeBot:
+    """Client resolving any channel id to a FakeChannel, counting API fetches like discord.py's client."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.channels = {}
+        self.fetches = 0
+
+    def get_channel(self, channel_id) -> FakeChannel:
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id) -> FakeChannel:
+        self.fetches += 1
+        if (self.latency > 0):
+            await asyncio.sleep(self.latency)
+        return self.channels.setdefault(channel_id, FakeChannel(channel_id, self.latency))
+
+    def sent_messages(self) -> int:
+        return sum(len(channel.messages) for channel in self.channels.values())
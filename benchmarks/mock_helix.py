@@ -0,0 +1,84 @@
+# benchmarks/mock_helix.py
+# Local stand-in for the Twitch Helix API: the app access token endpoint and the 'streams' endpoint.
+# Usage: python -m benchmarks.mock_helix [--port N] [--live-ratio R] [--token-lifetime S]
+# Python libraries
+import random
+import secrets
+import argparse
+
+# External libraries
+from aiohttp import web
+
+CLIENT_ID = 'mock-client-id'
+CLIENT_SECRET = 'mock-client-secret'
+MAX_LOGINS = 100
+
+class MockHelix:
+    """Issues expiring tokens and reports a random but stable subset of logins as live."""
+
+    def __init__(self, live_ratio=0.1, token_lifetime=3600, seed=0):
+        self.live_ratio = live_ratio
+        self.token_lifetime = token_lifetime
+        self.seed = seed
+        self.tokens = set()
+        self.token_requests = 0
+        self.stream_requests = 0
+
+    def is_live(self, login) -> bool:
+        return random.Random(f"{self.seed}:{login}").random() < self.live_ratio
+
+    async def token(self, request) -> web.Response:
+        self.token_requests += 1
+        query = request.query
+        if (query.get('client_id') != CLIENT_ID or query.get('client_secret') != CLIENT_SECRET
+                or query.get('grant_type') != 'client_credentials'):
+            return web.json_response({'status': 400, 'message': 'invalid client'}, status=400)
+        token = secrets.token_hex(15)
+        self.tokens.add(token)
+        return web.json_response({'access_token': token, 'expires_in': self.token_lifetime, 'token_type': 'bearer'})
+
+    async def streams(self, request) -> web.Response:
+        self.stream_requests += 1
+        if (request.headers.get('Client-Id') != CLIENT_ID):
+            return web.json_response({'error': 'Unauthorized', 'status': 401, 'message': 'invalid client id'}, status=401)
+        if (request.headers.get('Authorization', '').removeprefix('Bearer ') not in self.tokens):
+            return web.json_response({'error': 'Unauthorized', 'status': 401, 'message': 'invalid token'}, status=401)
+        logins = request.query.getall('user_login', [])
+        if (len(logins) > MAX_LOGINS):
+            return web.json_response({'error': 'Bad Request', 'status': 400, 'message': 'too many logins'}, status=400)
+        data = [{
+            'id': str(abs(hash(login))), 'user_login': login.lower(), 'user_name': login,
+            'type': 'live', 'title': f"{login} is streaming", 'viewer_count': 42}
+            for login in logins if self.is_live(login.lower())]
+        return web.json_response({'data': data, 'pagination': {}})
+
+    def revoke_tokens(self) -> None:
+        """Invalidates every issued token, as Twitch does when credentials are rotated."""
+        self.tokens.clear()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/oauth2/token', self.token)
+        app.router.add_get('/helix/streams', self.streams)
+        return app
+
+async def start(helix, host='127.0.0.1', port=0) -> (web.AppRunner, str):
+    """Starts serving in the running event loop. Returns the runner and the base url."""
+    runner = web.AppRunner(helix.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner, f"http://{host}:{runner.addresses[0][1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a stand-in Twitch Helix API.')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--live-ratio', type=float, default=0.1)
+    parser.add_argument('--token-lifetime', type=int, default=3600)
+    args = parser.parse_args()
+    base = f"http://127.0.0.1:{args.port}"
+    print(f"Set TWITCH_CLIENT_ID={CLIENT_ID}, TWITCH_CLIENT_SECRET={CLIENT_SECRET}, "
+          f"TWITCH_API_URL={base}/helix and TWITCH_AUTH_URL={base}/oauth2/token")
+    web.run_app(MockHelix(args.live_ratio, args.token_lifetime).app(), host='127.0.0.1', port=args.port)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/mock_hub.py
+# Local stand-in for a WebSub hub: verifies subscribers through their callback and signs published feeds.
+# Usage: python -m benchmarks.mock_hub [--port N]
+# Python libraries
+import hmac
+import time
+import asyncio
+import secrets
+import argparse
+import hashlib
+
+# External libraries
+import aiohttp
+from aiohttp import web
+
+FEED_ENTRY = """<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+  <link rel="self" href="{topic}"/>
+  <title>YouTube video feed</title>
+  <entry>
+    <id>yt:video:{video_id}</id>
+    <yt:videoId>{video_id}</yt:videoId>
+    <yt:channelId>{channel_id}</yt:channelId>
+    <title>Stream starting soon</title>
+    <published>2026-10-18T20:00:00+00:00</published>
+    <updated>2026-10-18T20:00:00+00:00</updated>
+  </entry>
+</feed>
+"""
+
+class MockHub:
+    """Keeps verified subscriptions per topic and delivers published feeds to their callbacks."""
+
+    def __init__(self, max_lease=864000):
+        self.max_lease = max_lease
+        self.subscriptions = {} # (callback, topic) -> (secret, expiry time)
+        self.verifications = 0
+        self.deliveries = 0
+        self.tasks = set()
+
+    async def verify(self, callback, topic, mode, lease, secret) -> None:
+        """Confirms intent like a real hub: the callback must echo the challenge."""
+        challenge = secrets.token_hex(8)
+        parameters = {'hub.mode': mode, 'hub.topic': topic, 'hub.challenge': challenge, 'hub.lease_seconds': str(lease)}
+        async with aiohttp.ClientSession() as session:
+            async with session.get(callback, params=parameters) as response:
+                confirmed = response.status == 200 and (await response.text()) == challenge
+        self.verifications += 1
+        if (not confirmed):
+            return
+        if (mode == 'subscribe'):
+            self.subscriptions[(callback, topic)] = (secret, time.time() + lease)
+        else:
+            self.subscriptions.pop((callback, topic), None)
+
+    async def subscribe(self, request) -> web.Response:
+        form = await request.post()
+        callback, topic, mode = form.get('hub.callback'), form.get('hub.topic'), form.get('hub.mode')
+        if (not callback or not topic or mode not in ('subscribe', 'unsubscribe')):
+            return web.Response(status=400, text="Invalid request")
+        lease = min(int(form.get('hub.lease_seconds', self.max_lease)), self.max_lease)
+        task = asyncio.create_task(self.verify(callback, topic, mode, lease, form.get('hub.secret', '')))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return web.Response(status=202)
+
+    async def publish(self, channel_id, video_id='dQw4w9WgXcQ') -> int:
+        """Delivers a new entry of a channel's feed to its subscribers. Returns how many were notified."""
+        topic = f'https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}'
+        body = FEED_ENTRY.format(topic=topic, video_id=video_id, channel_id=channel_id).encode()
+        delivered = 0
+        async with aiohttp.ClientSession() as session:
+            for (callback, subscribed_topic), (secret, expires) in list(self.subscriptions.items()):
+                if (subscribed_topic != topic or expires < time.time()):
+                    continue
+                headers = {'Content-Type': 'application/atom+xml'}
+                if (secret):
+                    headers['X-Hub-Signature'] = 'sha1=' + hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+                async with session.post(callback, data=body, headers=headers) as response:
+                    delivered += response.status < 300
+        self.deliveries += delivered
+        return delivered
+
+    async def handle_publish(self, request) -> web.Response:
+        """Test helper: POST /publish?channel_id=UC... delivers a new entry of that channel."""
+        delivered = await self.publish(request.query['channel_id'])
+        return web.Response(text=f"Delivered to {delivered} subscriber(s)\n")
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/subscribe', self.subscribe)
+        app.router.add_post('/publish', self.handle_publish)
+        return app
+
+async def start(hub, host='127.0.0.1', port=0) -> (web.AppRunner, str):
+    """Starts serving in the running event loop. Returns the runner and the base url."""
+    runner = web.AppRunner(hub.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner, f"http://{host}:{runner.addresses[0][1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a stand-in WebSub hub.')
+    parser.add_argument('--port', type=int, default=8082)
+    args = parser.parse_args()
+    print(f"Set WEBSUB_HUB_URL=http://127.0.0.1:{args.port}/subscribe, "
+          f"then POST http://127.0.0.1:{args.port}/publish?channel_id=UC... to announce a new video")
+    web.run_app(MockHub().app(), host='127.0.0.1', port=args.port)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+# benchmarks/pages.py
+# Python libraries
+import os
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+PAGE_SIZE = 1024 * 1024 # Real channel pages weigh around 1 MB
+FILLER = b'<div class="filler" data-x="0123456789abcdef">lorem ipsum dolor sit amet</div>\n'
+
+def load_page(name, size=PAGE_SIZE) -> bytes:
+    """Loads a saved page fixture, padding it with filler markup up to approximately the given size."""
+    with open(os.path.join(FIXTURES_DIR, f'{name}.html'), 'rb') as file:
+        template = file.read()
+    slots = template.count(b'<!-- PADDING -->')
+    padding_size = max(size - len(template), 0) // max(slots, 1)
+    padding = FILLER * (padding_size // len(FILLER))
+    return template.replace(b'<!-- PADDING -->', padding)
+
+def fixture_names() -> [str]:
+    """Lists the available page fixtures."""
+    return sorted(file[:-5] for file in os.listdir(FIXTURES_DIR) if file.endswith('.html'))
@@ -0,0 +1,56 @@
+# benchmarks/seed.py
+# Creates a synthetic livestreams database.
+# Usage: python -m benchmarks.seed FILE [--channels N] [--subscribers N] [--guilds N]
+# Python libraries
+import random
+import sqlite3
+import argparse
+
+# Local module
+import database
+
+PLATFORMS = ("YouTube", "Twitch")
+
+def channel_name(index) -> str:
+    return f"streamer{index:06d}"
+
+def seed(filename, channels, subscribers, migrated=True, dschannels=10, guilds=1) -> sqlite3.Connection:
+    """
+    Creates a database holding synthetic channels, alternating platforms, and random unique subscriptions.
+    The data is written in the original schema, then migrated unless migrated=False, in which case the schema
+    before migration 2 is kept. Once migrated, every channel is followed by the given number of servers.
+    Returns the open connection, also set as database.CONNECTION.
+    """
+    database.CONNECTION = sqlite3.connect(filename)
+    connection = database.CONNECTION
+    connection.executescript(database.migration_1())
+    with connection:
+        connection.executemany(
+            "INSERT INTO channels (name, platform, dschannel) VALUES (?, ?, ?);",
+            [(channel_name(i), PLATFORMS[i % 2], 1 + i % dschannels) for i in range(channels)])
+        users = max(subscribers // 20, 1)
+        rows = set()
+        while (len(rows) < min(subscribers, users * channels)):
+            rows.add((random.randrange(users), random.randrange(1, channels + 1)))
+        connection.executemany("INSERT INTO subscribers (user_id, channel_id) VALUES (?, ?);", rows)
+    if (migrated):
+        database.migrate()
+        with connection:
+            connection.execute("UPDATE targets SET guild = 1;")
+            connection.executemany(
+                "INSERT INTO targets (channel_id, guild, dschannel) VALUES (?, ?, ?);",
+                [(i + 1, guild, guild * 1000 + i % dschannels) for guild in range(2, guilds + 1) for i in range(channels)])
+    return connection
+
+def main():
+    parser = argparse.ArgumentParser(description='Create a synthetic livestreams database.')
+    parser.add_argument('file')
+    parser.add_argument('--channels', type=int, default=1000)
+    parser.add_argument('--subscribers', type=int, default=10000)
+    parser.add_argument('--guilds', type=int, default=1, help="Servers following every channel")
+    args = parser.parse_args()
+    seed(args.file, args.channels, args.subscribers, guilds=args.guilds).close()
+    print(f"Seeded {args.file} with {args.channels} channels and {args.subscribers} subscriptions.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/stub_server.py
+# Local stand-in for YouTube and Twitch, serving the saved page fixtures.
+# YouTube pages are served under /yt/@{name}/live and Twitch pages under /tw/{name}.
+# Usage: python -m benchmarks.stub_server [--port N] [--latency MS] [--live-ratio R] [--error-ratio R] ...
+# Python libraries
+import random
+import asyncio
+import argparse
+
+# Local module
+from benchmarks.pages import load_page
+
+# External libraries
+from aiohttp import web
+
+class StubPlatforms:
+    """Serves live, offline, malformed and failing channel pages with configurable latency."""
+
+    def __init__(self, page_size=256 * 1024, latency=0.05, jitter=0.02,
+                 live_ratio=0.1, malformed_ratio=0.01, error_ratio=0.01):
+        self.latency = latency
+        self.jitter = jitter
+        self.live_ratio = live_ratio
+        self.malformed_ratio = malformed_ratio
+        self.error_ratio = error_ratio
+        self.pages = {name: load_page(name, page_size) for name in (
+            'youtube_live', 'youtube_offline', 'twitch_live', 'twitch_offline')}
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0 # Before compression
+
+    def pick(self, platform) -> (str, bytes):
+        """Chooses the variant of a page at random, following the configured ratios. Returns its ETag and body."""
+        draw = random.random()
+        if (draw < self.malformed_ratio):
+            return f'"{platform}-malformed"', self.pages[f'{platform}_live'][:200] # Cut before any marker
+        if (draw < self.malformed_ratio + self.live_ratio):
+            return f'"{platform}-live"', self.pages[f'{platform}_live']
+        return f'"{platform}-offline"', self.pages[f'{platform}_offline']
+
+    async def respond(self, request, platform) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+        if (random.random() < self.error_ratio):
+            return web.Response(status=503, text="Service Unavailable")
+        etag, body = self.pick(platform)
+        if (request.headers.get('If-None-Match') == etag):
+            self.not_modified += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        self.bytes_sent += len(body)
+        response = web.Response(body=body, content_type='text/html', headers={'ETag': etag})
+        if ('gzip' in request.headers.get('Accept-Encoding', '')):
+            response.enable_compression(web.ContentCoding.gzip)
+        return response
+
+    async def youtube(self, request) -> web.Response:
+        return await self.respond(request, 'youtube')
+
+    async def twitch(self, request) -> web.Response:
+        return await self.respond(request, 'twitch')
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/yt/@{name}/live', self.youtube)
+        app.router.add_get('/tw/{name}', self.twitch)
+        return app
+
+async def start(platforms, host='127.0.0.1', port=0) -> (web.AppRunner, str):
+    """Starts serving in the running event loop. Returns the runner and the base url."""
+    runner = web.AppRunner(platforms.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}"
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve stand-in YouTube and Twitch pages.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--page-size', type=int, default=256 * 1024)
+    parser.add_argument('--latency', type=float, default=50, help="Milliseconds before answering")
+    parser.add_argument('--jitter', type=float, default=20, help="Milliseconds of random latency variation")
+    parser.add_argument('--live-ratio', type=float, default=0.1)
+    parser.add_argument('--malformed-ratio', type=float, default=0.01)
+    parser.add_argument('--error-ratio', type=float, default=0.01)
+    args = parser.parse_args()
+    platforms = StubPlatforms(args.page_size, args.latency / 1000, args.jitter / 1000,
+                              args.live_ratio, args.malformed_ratio, args.error_ratio)
+    print(f"Set YOUTUBE_URL=http://127.0.0.1:{args.port}/yt and TWITCH_URL=http://127.0.0.1:{args.port}/tw")
+    web.run_app(platforms.app(), host='127.0.0.1', port=args.port)
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,30 @@
 # bot.py
 # Python libraries
+import io
 import os
+import json
+import time
 import asyncio
-import requests
+import hashlib
 
-# Local module
+# Local modules
+import config
 import database
+import async_database
+import channel_store
+import target_store
+import notifier
+import fanout
+import listing
+import importer
+import autocomplete
+import poller
+import metrics
+import monitor
+import history
+import transitions
+import response_cache
+import websub
 
 # External libraries
 from dotenv import load_dotenv
@@ -13,6 +32,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 from discord.app_commands import Choice
+from listing import remove_urls
 
 # .env variables
 load_dotenv()
@@ -21,100 +41,125 @@ TOKEN = os.getenv('DISCORD_TOKEN')
 # Variables for bot initialization
 INTENTS = discord.Intents.default()
 BOT = commands.Bot(command_prefix="!", intents=INTENTS)
+BACKGROUND_TASKS = set() # References to fire-and-forget tasks, so they aren't garbage collected
+EVENT_BATCH = 500        # State changes taken from the database per read in notifier mode
+LOADED = False           # Whether the in-memory stores were loaded from the database
+STARTED = False          # Whether on_ready fully initialized the bot, as reconnections call it again
 
-def remove_urls(title) -> str:
-    """Removes any urls present in a livestream's title."""
-    if (title.find('http') > 0):
-        final = ""
-        split = title.split('http')
-        if (len(split[0]) > 0):
-            final += split[0][:-1]
-        if (split[1].find(' ') > 0):
-            final += split[1].split(' ')[1]
-    else:
-        final = title
-    return final
-
-def get_notify_message(url, title, name, channel_id, mention_everyone) -> str:
-    """Structures the message to notify channel subscribers."""
-    prefix = f'## {name}\'s [stream is live]({url}) !'
-    message = prefix + f'\nGo watch today\'s stream **{remove_urls(title)}**\n*'
+async def get_notify_messages(url, title, name, target_id, mention_everyone, role_id) -> [str]:
+    """
+    Structures the messages to notify channel subscribers.
+    Subscriber mentions are split across as many messages as needed, while everyone and role modes need a single one.
+    """
+    header = f'## {name}\'s [stream is live]({url}) !'
+    header += f'\nGo watch today\'s stream **{remove_urls(title)[:fanout.TITLE_LIMIT]}**\n'
+    if (role_id is not None):
+        return [header + f'*<@&{role_id}> get in here!*']
     if (mention_everyone):
-        message += '@here get in here!'
-    else:
-        message += 'Subscribers:  '
-        for sub in database.get_subs(channel_id):
-            message += f"<@{sub}>; "
-    message += "*"
-    return message
-
-async def register_channel_status(name, title, url, is_live) -> None:
-    """Handles the actions to be realized when a stream is found to go online/offline."""
-    ch_id, ch_name, platform, dschannel_id, mentions, status, ch_title, flag = database.get_channel_by_name(name)
-    if (not bool(status) and is_live):
-        message = get_notify_message(url, title, name, ch_id, bool(mentions))
-        database.update_int_value('channels', 'islive', True, 'id', ch_id)
-        database.update_str_value('channels', 'livetitle', title, 'id', ch_id)
-        database.update_int_value('channels', 'deleteflag', False, 'id', ch_id)
-        ds_channel = await BOT.fetch_channel(dschannel_id)
-        allowed_mentions = discord.AllowedMentions(roles=True)
-        await ds_channel.send(message, allowed_mentions=allowed_mentions)
-    elif (bool(status) and is_live):
-        database.update_int_value('channels', 'deleteflag', False, 'id', ch_id)
-    elif (bool(status) and not is_live):
-        if (bool(flag)):
-            database.update_int_value('channels', 'islive', False, 'id', ch_id)
-            database.update_str_value('channels', 'livetitle', None, 'id', ch_id)
-            database.update_int_value('channels', 'deleteflag', False, 'id', ch_id)
-        else:
-            database.update_int_value('channels', 'deleteflag', True, 'id', ch_id)
-
-async def is_live_YT(name) -> None:
-    """Checks if a YouTube channel is live."""
-    url = f'https://www.youtube.com/@{name}/live'
-    x = requests.get(url)
-    content = x.content.decode('utf8')
-    title = content.split('<title>')[1].split('</title>')[0]
-    aux = content.split('<link rel="canonical" href="https://www.youtube.com/')
-    aux = aux[1].split('>')[0].split('?') if len(aux) > 0 else []
-    is_livestream = aux.count('watch') > 0
-    is_live = content.split('"status":"', maxsplit=2)[1].split('"', maxsplit=2)[0] == 'OK' if is_livestream else False
-    await register_channel_status(name, title, url, is_live)
-
-async def is_live_TW(name) -> None:
-    """Checks if a Twitch channel is live."""
-    url = f'https://www.twitch.tv/{name}'
-    x = requests.get(url)
-    content = x.content.decode('utf8')
-    is_live = content.find('"isLiveBroadcast":true') > 0
-    title = content.split('"VideoObject","description":"')[1].split('"')[0] if is_live else ""
-    await register_channel_status(name, title, url, is_live)
-
-# Periodic check for livestreams
-@tasks.loop(minutes=5)
+        return [header + '*@here get in here!*']
+    return fanout.split_mentions(header, await fanout.get_mentions(target_id))
+
+async def on_channel_change(row, kind, title, url) -> None:
+    """
+    Queues the notification of a channel that went live, in every server following it.
+    Streams resumed shortly after ending aren't notified again.
+    """
+    listing.refresh_channel(row[0])
+    if (kind != 'live'):
+        return
+    for target_id, ch_id, guild, dschannel_id, everyone, role_id in target_store.for_channel(row[0]):
+        for message in await get_notify_messages(url, title, row[1], target_id, bool(everyone), role_id):
+            notifier.enqueue(dschannel_id, message)
+
+async def assign_guilds() -> None:
+    """Fills in the server of targets created before several servers were supported, from their text channel."""
+    for target_row in target_store.for_guild(None):
+        channel = BOT.get_channel(target_row[3])
+        if (channel is not None and getattr(channel, 'guild', None) is not None):
+            await target_store.update(target_row[0], 'guild', channel.guild.id)
+
+# Periodic check for livestreams, each channel being checked when the scheduler says it is due
+@tasks.loop(seconds=config.SCHEDULER_TICK)
 async def check_live():
-    yt_channels = [channel_row[1] for channel_row in database.get_channels("YouTube")]
-    for channel in yt_channels:
-        await is_live_YT(channel)
-    
-    tw_channels = [channel_row[1] for channel_row in database.get_channels("Twitch")]
-    for channel in tw_channels:
-        await is_live_TW(channel)
+    await monitor.run_due()
 
 @check_live.before_loop
 async def preparation():
     await BOT.wait_until_ready()
+    for channel_row in channel_store.get_channels():
+        monitor.schedule(channel_row)
+
+@check_live.after_loop
+async def cleanup():
+    await monitor.wait_checks()
+    await channel_store.flush()
+    await monitor.save_state()
+    await poller.close_session()
 
-# Function called when bot starts
+# Notifier mode: state changes are detected by poller workers (worker.py) and read back from the database
+@tasks.loop(seconds=config.EVENT_POLL)
+async def consume_events():
+    events = await async_database.write(database.take_events, EVENT_BATCH)
+    for event_id, ch_id, kind, title, url, created in events:
+        metrics.observe('event_delay_seconds', time.time() - created)
+        channel_store.set_cached(ch_id, 'islive', kind != 'offline') # Already written by the worker
+        channel_store.set_cached(ch_id, 'livetitle', title)
+        row = channel_store.get(ch_id)
+        if (row is not None):
+            await on_channel_change(row, kind, title, url)
+
+@consume_events.before_loop
+async def wait_ready():
+    await BOT.wait_until_ready()
+
+async def sync_commands() -> None:
+    """Syncs the / commands with Discord, unless they didn't change since the last sync."""
+    commands_hash = hashlib.sha256(json.dumps(
+        [BOT.application_id, [command.to_dict(BOT.tree) for command in BOT.tree.get_commands()]],
+        sort_keys=True).encode()).hexdigest()
+    if (commands_hash == await async_database.read(database.get_setting, 'command_tree_hash')):
+        print("Commands unchanged, skipping sync.")
+        return
+    synced = await BOT.tree.sync()
+    await async_database.write(database.set_setting, 'command_tree_hash', commands_hash)
+    print(f"Synced {len(synced)} commands(s).")
+
+# Function called when bot starts, and again after every reconnection
 @BOT.event
 async def on_ready():
+    """
+    Loads the bot's data and starts its tasks. Every step can be run again, so initialization that
+    failed part way is completed on the next reconnection, while a complete one is never repeated.
+    """
+    global LOADED, STARTED
+    if (STARTED):
+        return
     try:
-        database.init_connection()
-        synced = await BOT.tree.sync()
-        print(f"Synced {len(synced)} commands(s).")
-        check_live.start()
+        await async_database.start()
+        if (not LOADED):
+            await channel_store.load()
+            await target_store.load()
+            await assign_guilds()
+            autocomplete.load(
+                [(row[0], channel_store.get(row[1])[1], row[2]) for row in target_store.get_targets() if channel_store.get(row[1]) is not None],
+                await async_database.read(database.get_all_subs))
+            await monitor.load_state()
+            await history.load_starts()
+            LOADED = True
+        monitor.ON_CHANGE = on_channel_change
+        notifier.start(BOT)
+        await metrics.start()
+        if (config.POLLER_MODE == 'notifier'):
+            if (not consume_events.is_running()):
+                consume_events.start()
+        else:
+            if (not check_live.is_running()):
+                check_live.start()
+            await websub.start(monitor.on_feed_entry, [row[5] for row in channel_store.get_channels("YouTube") if row[5] is not None])
+        await sync_commands()
+        STARTED = True
     except Exception as exception:
-        print(exception)
+        print(f"Startup failed, retrying on the next reconnection: {exception!r}")
 
 # Argument descriptions for / commands
 @app_commands.describe(
@@ -124,17 +169,27 @@ async def on_ready():
 # Admin / commands:
 # ⭐ /add command decorators
 @BOT.tree.command(name="add", description="Add a Twitch or YouTube channel to database.")
+@app_commands.guild_only()
 async def add(
         interaction: discord.Interaction,
         platform: str,
         channel: str):
-    channels = [channel[1] for channel in database.get_channels(platform)]
-    if (channel not in channels):
-        database.add_channel(channel, platform, interaction.channel.id)
-        url_prefix = "https://www.youtube.com/@" if platform == "YouTube" else "https://www.twitch.tv/"
-        await interaction.response.send_message(f"## {platform} channel **[{channel}]({url_prefix}{channel})** registered!")
-    else:
+    channel_row = channel_store.get_by_name(platform, channel)
+    if (channel_row is None):
+        await async_database.write(database.add_channel, channel, platform)
+        channel_row = await async_database.read(database.get_channel_by_name, platform, channel)
+        channel_store.add(channel_row)
+        monitor.SCHEDULER.add((platform, channel), delay=0)
+    elif (target_store.find(channel_row[0], interaction.guild_id) is not None):
         await interaction.response.send_message("Channel is already registered!", ephemeral=True)
+        return
+    await async_database.write(database.add_target, channel_row[0], interaction.guild_id, interaction.channel.id)
+    target_row = await async_database.read(database.get_target, channel_row[0], interaction.guild_id)
+    target_store.add(target_row)
+    autocomplete.add_channel(target_row[0], channel, interaction.guild_id)
+    listing.invalidate_guild(interaction.guild_id)
+    url_prefix = "https://www.youtube.com/@" if platform == "YouTube" else "https://www.twitch.tv/"
+    await interaction.response.send_message(f"## {platform} channel **[{channel}]({url_prefix}{channel})** registered!")
 
 @add.autocomplete("platform")
 async def autocomplete_platform(
@@ -143,18 +198,47 @@ async def autocomplete_platform(
     return [discord.app_commands.Choice(name="YouTube", value="YouTube"),
             discord.app_commands.Choice(name="Twitch", value="Twitch")]
 
+def get_guild_target(interaction, value) -> tuple:
+    """Gets the target chosen in a command's channel argument, if it belongs to the server the command was used in."""
+    try:
+        target_row = target_store.get(int(value))
+    except ValueError:
+        return None
+    if (target_row is None or target_row[2] != interaction.guild_id):
+        return None
+    return target_row
+
+async def forget_channel(channel_row) -> None:
+    """Stops checking a channel no server follows anymore."""
+    key = (channel_row[2], channel_row[1])
+    monitor.SCHEDULER.remove(key)
+    transitions.forget(key)
+    response_cache.forget(key)
+    listing.remove_channel(channel_row[0])
+    channel_store.remove(channel_row[0])
+    await websub.unsubscribe(channel_row[5])
+    await async_database.write(database.remove_channel, channel_row[0])
+
 # ⭐ /remove command decorators
 @BOT.tree.command(name="remove", description="Remove a channel from the database.")
+@app_commands.guild_only()
 async def remove(
         interaction: discord.Interaction,
         channel: str):
-    rows = database.get_channels()
-    channel_id = int(channel)
-    ids = [row[0] for row in rows]
-    if (channel_id in ids):
-        channel_name = database.get_channel(channel_id)[1] # Get channel's name
-        database.remove_channel(channel_id)
-        database.remove_subs(channel_id)
+    target_row = get_guild_target(interaction, channel)
+    if (target_row is not None):
+        target_id, channel_id, role_id = target_row[0], target_row[1], target_row[5]
+        channel_row = channel_store.get(channel_id)
+        channel_name = channel_row[1] # Get channel's name
+        target_store.remove(target_id)
+        autocomplete.remove_channel(target_id)
+        listing.invalidate_guild(interaction.guild_id)
+        fanout.invalidate(target_id)
+        if (role_id is not None):
+            await delete_mention_role(interaction.guild, role_id)
+        await async_database.write(database.remove_target, target_id)
+        if (len(target_store.for_channel(channel_id)) < 1):
+            await forget_channel(channel_row)
         await interaction.response.send_message(f"## Channel **{channel_name}** removed!")
     else:
         await interaction.response.send_message(f"Channel doesn't exist.", ephemeral=True)
@@ -163,58 +247,104 @@ async def remove(
 async def autocomplete_allchannels(
     interaction: discord.Interaction,
     current: str):
-    channels = database.get_channels()
+    channels = autocomplete.search(interaction.guild_id, current)
     channels = [discord.app_commands.Choice(name=channel[1], value=str(channel[0])) for channel in channels]
     return channels
 
 # ⭐ /setchannel decorators
 @BOT.tree.command(name="setchannel", description="Set current Discord text channel to post notifications when channel goes live.")
+@app_commands.guild_only()
 async def setchannel(
         interaction: discord.Interaction,
         channel: str):
-    channel_id = int(channel)
-    rows = database.get_channels()
-    ids = [row[0] for row in rows]
-    if (channel_id not in ids):
+    target_row = get_guild_target(interaction, channel)
+    if (target_row is None):
         await interaction.response.send_message("Channel doesn't exist!", ephemeral=True)
     else:
-        database.update_int_value("channels", "dschannel", interaction.channel.id, "id", channel_id)
-        channel_name = database.get_channel(channel_id)[1]
+        await target_store.update(target_row[0], "dschannel", interaction.channel.id)
+        channel_name = channel_store.get(target_row[1])[1]
         await interaction.response.send_message(f"{channel_name}'s livestreams will be notified here!")
 
 @setchannel.autocomplete("channel")
 async def autocomplete_setchannel_channel(
     interaction: discord.Interaction,
     current: str):
-    channels = database.get_channels()
+    channels = autocomplete.search(interaction.guild_id, current)
     channels = [discord.app_commands.Choice(name=channel[1], value=str(channel[0])) for channel in channels]
     return channels
 
+async def add_role_to_subscribers(guild, role, target_id) -> None:
+    """Gives a channel's mention role to its current subscribers."""
+    for user_id in await async_database.read(database.get_subs, target_id):
+        try:
+            member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+            await member.add_roles(role)
+        except discord.HTTPException as e:
+            print(f"Couldn't give role {role.id} to {user_id}: {e}")
+
+async def set_subscriber_role(member, role_id, subscribed) -> None:
+    """Gives or takes a channel's mention role when a member (un)subscribes."""
+    if (role_id is None):
+        return
+    try:
+        if (subscribed):
+            await member.add_roles(discord.Object(id=role_id))
+        else:
+            await member.remove_roles(discord.Object(id=role_id))
+    except discord.HTTPException as e:
+        print(f"Couldn't update role {role_id} of {member.id}: {e}")
+
+async def delete_mention_role(guild, role_id) -> None:
+    """Deletes a channel's mention role, if it still exists."""
+    role = guild.get_role(role_id) if guild is not None else None
+    if (role is not None):
+        try:
+            await role.delete()
+        except discord.HTTPException as e:
+            print(f"Couldn't delete role {role_id}: {e}")
+
 # ⭐ /mentions decorators
-@BOT.tree.command(name="mentions", description="Sets whether the notification will mention everyone or only the subscribers.")
+@BOT.tree.command(name="mentions", description="Sets whether the notification will mention everyone, the subscribers or a role.")
+@app_commands.guild_only()
 async def mentions(
         interaction: discord.Interaction,
         channel: str,
-        mode: str): # True: Mention everyone; False: Mention subscribers only
-    channel_id = int(channel)
-    rows = database.get_channels()
-    ids = [row[0] for row in rows]
-    mode_bool = True if mode == 'Everyone' else False
-    if (channel_id not in ids):
+        mode: str): # Everyone: @here; Subscribers only: one mention per subscriber; Role: a role given to subscribers
+    target_row = get_guild_target(interaction, channel)
+    if (target_row is None):
         await interaction.response.send_message("Channel doesn't exist!", ephemeral=True)
+        return
+    target_id, role_id = target_row[0], target_row[5]
+    channel_name = channel_store.get(target_row[1])[1]
+    if (mode == 'Role'):
+        if (role_id is None):
+            try:
+                role = await interaction.guild.create_role(name=f"{channel_name} live", mentionable=True)
+            except discord.HTTPException:
+                await interaction.response.send_message("I need the Manage Roles permission to create the role.", ephemeral=True)
+                return
+            await target_store.update(target_id, "role", role.id)
+            task = asyncio.create_task(add_role_to_subscribers(interaction.guild, role, target_id))
+            BACKGROUND_TASKS.add(task)
+            task.add_done_callback(BACKGROUND_TASKS.discard)
+        await target_store.update(target_id, "everyone", False)
+        await interaction.response.send_message(f"## {channel_name} will now be notified to its subscribers' role!")
+        return
+    mode_bool = True if mode == 'Everyone' else False
+    if (role_id is not None):
+        await delete_mention_role(interaction.guild, role_id)
+        await target_store.update(target_id, "role", None)
+    await target_store.update(target_id, "everyone", mode_bool)
+    if (mode_bool):
+        await interaction.response.send_message(f"## {channel_name} will now be notified to everyone!")
     else:
-        database.update_int_value("channels", "everyone", mode_bool, "id", channel_id)
-        channel_name = database.get_channel(channel_id)[1]
-        if (mode_bool):
-            await interaction.response.send_message(f"## {channel_name} will now be notified to everyone!")
-        else:
-            await interaction.response.send_message(f"## {channel_name} will now only be notified to subscribers!")
+        await interaction.response.send_message(f"## {channel_name} will now only be notified to subscribers!")
 
 @mentions.autocomplete("channel")
 async def autocomplete_mentions_channel(
     interaction: discord.Interaction,
     current: str):
-    channels = database.get_channels()
+    channels = autocomplete.search(interaction.guild_id, current)
     channels = [discord.app_commands.Choice(name=channel[1], value=str(channel[0])) for channel in channels]
     return channels
 
@@ -224,39 +354,53 @@ async def autocomplete_mentions_mode(
     current: str):
     modes = [
         discord.app_commands.Choice(name='Everyone', value='Everyone'),
-        discord.app_commands.Choice(name='Subscribers only', value='Subscribers only')]
+        discord.app_commands.Choice(name='Subscribers only', value='Subscribers only'),
+        discord.app_commands.Choice(name='Subscribers role', value='Role')]
     return modes
 
 # ⭐ /subscribe decorators
 @BOT.tree.command(name="subscribe", description="Subscribe to specified channel.")
+@app_commands.guild_only()
 async def subscribe(
         interaction: discord.Interaction,
         channel: str):
-    channel_id = int(channel)
-    if (interaction.user.id in database.get_subs(channel)):
+    target_row = get_guild_target(interaction, channel)
+    if (target_row is None):
+        await interaction.response.send_message("Channel doesn't exist!", ephemeral=True)
+        return
+    target_id = target_row[0]
+    if (interaction.user.id in await async_database.read(database.get_subs, target_id)):
         await interaction.response.send_message("You are already subscribed to this channel!", ephemeral=True)
     else:
-        database.add_sub(interaction.user.id, channel_id)
-        channel_name = database.get_channel(channel_id)[1]
+        await async_database.write(database.add_sub, interaction.user.id, target_id)
+        autocomplete.subscribe(interaction.user.id, target_id)
+        fanout.invalidate(target_id)
+        channel_name = channel_store.get(target_row[1])[1]
+        await set_subscriber_role(interaction.user, target_row[5], True)
         await interaction.response.send_message(f"Succesfully subscribed to {channel_name}!", ephemeral=True)
 
 @subscribe.autocomplete("channel")
 async def autocomplete_sub_channel(
         interaction: discord.Interaction,
         current: str):
-    channels = database.get_unsubd(interaction.user.id)
+    channels = autocomplete.unsubscribed(interaction.guild_id, interaction.user.id, current)
     channels = [discord.app_commands.Choice(name=channel[1], value=str(channel[0])) for channel in channels]
     return channels
 
 # ⭐ /unsubscribe decorators
 @BOT.tree.command(name="unsubscribe", description="Unsubscribe to specified channel.")
+@app_commands.guild_only()
 async def unsubscribe(
         interaction: discord.Interaction,
         channel: str):
-    channel_id = int(channel)
-    if (channel_id in [row[0] for row in database.get_subd(interaction.user.id)]):
-        database.remove_sub(interaction.user.id, channel_id)
-        channel_name = database.get_channel(channel_id)[1]
+    target_row = get_guild_target(interaction, channel)
+    if (target_row is not None and interaction.user.id in await async_database.read(database.get_subs, target_row[0])):
+        target_id = target_row[0]
+        await async_database.write(database.remove_sub, interaction.user.id, target_id)
+        autocomplete.unsubscribe(interaction.user.id, target_id)
+        fanout.invalidate(target_id)
+        channel_name = channel_store.get(target_row[1])[1]
+        await set_subscriber_role(interaction.user, target_row[5], False)
         await interaction.response.send_message(f"Succesfully unsubscribed to {channel_name}!", ephemeral=True)
     else:
         await interaction.response.send_message("You are not subscribed to this channel.", ephemeral=True)
@@ -265,31 +409,60 @@ async def unsubscribe(
 async def autocomplete_unsub_channel(
     interaction: discord.Interaction,
     current: str):
-    channels = database.get_subd(interaction.user.id)
+    channels = autocomplete.subscribed(interaction.guild_id, interaction.user.id, current)
     channels = [discord.app_commands.Choice(name=channel[1], value=str(channel[0])) for channel in channels]
     return channels
 
+class ChannelListView(discord.ui.View):
+    """Buttons browsing the pages of /channels, read from the listing cache on every click."""
+
+    def __init__(self, guild, platform):
+        super().__init__(timeout=300)
+        self.guild = guild
+        self.platform = platform
+        self.page = 0
+        self.live_only = False
+
+    def render(self) -> str:
+        """Gets the current page, clamped to the pages that exist now, and updates the buttons."""
+        pages = listing.get_pages(self.guild, self.platform, self.live_only)
+        self.page = min(self.page, len(pages) - 1)
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= len(pages) - 1
+        self.toggle_live.label = "Show all" if self.live_only else "Live only"
+        return pages[self.page] + f"\n-# Page {self.page + 1}/{len(pages)}"
+
+    async def show(self, interaction) -> None:
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(self.page - 1, 0)
+        await self.show(interaction)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await self.show(interaction)
+
+    @discord.ui.button(label="Live only", style=discord.ButtonStyle.primary)
+    async def toggle_live(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.live_only = not self.live_only
+        self.page = 0
+        await self.show(interaction)
+
 # ⭐ /channels decorators
 @BOT.tree.command(name="channels", description="Show the list of channels available.")
+@app_commands.guild_only()
 async def channels(
         interaction: discord.Interaction,
         platform: str):
-    if (platform.lower() == "youtube"):
-        url = "https://www.youtube.com/@{name}/live"
-    elif (platform.lower() == "twitch"):
-        url = "https://www.twitch.tv/{name}"
-    else:
+    platform = {"youtube": "YouTube", "twitch": "Twitch"}.get(platform.lower())
+    if (platform is None):
         await interaction.response.send_message("Invalid platform name.", ephemeral=True)
         return None
-    channels = database.get_channels(platform)
-    # channel = [name, status, url, title]
-    channels = [[channel[1], bool(channel[5]), url.format(name=channel[1]), channel[6]] for channel in channels]
-    channel_list = "# Channels:"
-    for channel in channels:
-        status = f"[{remove_urls(channel[3])}](<{channel[2]}>)" if channel[1] else "offline"
-        channel_list += f"\n* **{channel[0]}**: {status}"
-    await interaction.response.send_message(channel_list, ephemeral=True)
-    
+    view = ChannelListView(interaction.guild_id, platform)
+    await interaction.response.send_message(view.render(), view=view, ephemeral=True)
 
 @channels.autocomplete("platform")
 async def autocomplete_channels_platform(
@@ -298,6 +471,114 @@ async def autocomplete_channels_platform(
     return [discord.app_commands.Choice(name="YouTube", value="YouTube"),
             discord.app_commands.Choice(name="Twitch", value="Twitch")]
 
+def format_duration(seconds) -> str:
+    """Writes a duration as hours and minutes, or minutes and seconds when under an hour."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours > 0 else f"{minutes}m {seconds:02d}s"
+
+def get_history_message(name, sessions, recent, overall) -> str:
+    """Structures the /history answer: the latest sessions of a channel, then its totals."""
+    message = f"# {name}'s streams:"
+    if (len(sessions) < 1 and not overall[0]):
+        return message + "\nNo stream recorded yet."
+    for started, ended, title, delay in sessions:
+        length = format_duration(ended - started) if ended is not None else "live now"
+        detected = f", noticed within {format_duration(delay)}" if delay is not None else ""
+        message += f"\n* <t:{int(started)}:f> ({length}{detected}): {remove_urls(title or '')[:history.TITLE_LIMIT]}"
+    for label, (count, seconds, delay, delays, first_day) in ((f"Last {history.REPORT_DAYS} days", recent), ("All time", overall)):
+        if (not count):
+            continue
+        message += f"\n**{label}:** {count} stream(s), {format_duration(seconds)} live"
+        if (delays):
+            message += f", noticed within {format_duration(delay / delays)} on average"
+        if (label == "All time"):
+            message += f", since <t:{int(first_day * 86400)}:D>"
+    return message[:notifier.MESSAGE_LIMIT]
+
+# ⭐ /history decorators
+@BOT.tree.command(name="history", description="Show the past streams of a channel.")
+@app_commands.guild_only()
+async def history_command(
+        interaction: discord.Interaction,
+        channel: str):
+    target_row = get_guild_target(interaction, channel)
+    if (target_row is None):
+        await interaction.response.send_message("Channel doesn't exist!", ephemeral=True)
+        return
+    sessions, recent, overall = await history.get_history(target_row[1])
+    channel_name = channel_store.get(target_row[1])[1]
+    await interaction.response.send_message(get_history_message(channel_name, sessions, recent, overall), ephemeral=True)
+
+@history_command.autocomplete("channel")
+async def autocomplete_history_channel(
+    interaction: discord.Interaction,
+    current: str):
+    channels = autocomplete.search(interaction.guild_id, current)
+    channels = [discord.app_commands.Choice(name=channel[1], value=str(channel[0])) for channel in channels]
+    return channels
+
+def get_import_report(added, followed, failures) -> (str, discord.File):
+    """Summarizes an import, attaching the failed entries as a file when they don't fit in the message."""
+    report = f"## {added} channel(s) imported!"
+    if (followed > 0):
+        report += f"\n{followed} channel(s) were already registered."
+    if (len(failures) < 1):
+        return report, None
+    lines = "".join(f"\n* `{line[:100]}`: {reason}" for line, reason in failures)
+    report += f"\n{len(failures)} entry(ies) couldn't be imported:"
+    if (len(report) + len(lines) <= notifier.MESSAGE_LIMIT):
+        return report + lines, None
+    text = "".join(f"{line}: {reason}\n" for line, reason in failures)
+    return report + " see the attached file.", discord.File(io.BytesIO(text.encode()), filename="import_failures.txt")
+
+# ⭐ /import decorators
+@BOT.tree.command(name="import", description="Add every channel listed in a CSV or text file.")
+@app_commands.describe(
+    file="CSV file of 'platform,channel' lines, or one channel per line.",
+    platform="Platform of the lines holding only a channel.")
+@app_commands.guild_only()
+async def import_channels(
+        interaction: discord.Interaction,
+        file: discord.Attachment,
+        platform: str = None):
+    if (file.size > importer.FILE_LIMIT):
+        await interaction.response.send_message(f"File is too large, at most {importer.FILE_LIMIT // 1024}KB are accepted.", ephemeral=True)
+        return
+    await interaction.response.defer() # Checking the channels takes longer than Discord waits for a reply
+    try:
+        text = (await file.read()).decode('utf-8-sig')
+    except (discord.HTTPException, UnicodeDecodeError):
+        await interaction.followup.send("Couldn't read the file, it must be UTF-8 text.", ephemeral=True)
+        return
+    entries, failures = importer.parse(text, platform)
+    added, followed, failed = await importer.import_channels(entries, interaction.guild_id, interaction.channel.id)
+    report, report_file = get_import_report(added, followed, failures + failed)
+    if (report_file is None):
+        await interaction.followup.send(report)
+    else:
+        await interaction.followup.send(report, file=report_file)
+
+@import_channels.autocomplete("platform")
+async def autocomplete_import_platform(
+    interaction: discord.Interaction,
+    current: str):
+    return [discord.app_commands.Choice(name="YouTube", value="YouTube"),
+            discord.app_commands.Choice(name="Twitch", value="Twitch")]
+
+# ⭐ /export decorators
+@BOT.tree.command(name="export", description="Get the list of channels registered in the server as a CSV file.")
+@app_commands.guild_only()
+async def export(interaction: discord.Interaction):
+    export_file = discord.File(io.BytesIO(importer.export(interaction.guild_id).encode()), filename="channels.csv")
+    await interaction.response.send_message("Channels registered in this server:", file=export_file, ephemeral=True)
+
+# ⭐ /stats decorators
+@BOT.tree.command(name="stats", description="Show the bot's polling, database and notification metrics.")
+@app_commands.default_permissions(administrator=True)
+async def stats(interaction: discord.Interaction):
+    await interaction.response.send_message(metrics.summary(), ephemeral=True)
+
 # /help command decorators
 @BOT.tree.command(name="help", description="Give a list of the available commands")
 async def help(interaction: discord.Interaction):
@@ -315,10 +596,19 @@ async def help(interaction: discord.Interaction):
                                             "   * Removes subscription to specified `channel`.\n" +
                                             "* `/channels [platform]`:\n"+
                                             "   * Lists all registered channels from specified `platform` and their current status.\n" +
+                                            "* `/history [channel]`:\n"+
+                                            "   * Shows the latest streams of `channel`, how long they lasted and how quickly they were noticed, along with its totals.\n" +
+                                            "* `/import [file] [platform]`:\n"+
+                                            "   * Registers every channel listed in a CSV (`platform,channel`) or text file (one channel per line), reporting those that couldn't be found.\n" +
+                                            "* `/export`:\n"+
+                                            "   * Sends the list of channels registered in the server as a CSV file that `/import` reads back.\n" +
                                             "* `/mentions [channel]`:\n"+
-                                            "   * Changes the notification mode of the channel between mentioning everyone connected (`@here`) or subscribers only.\n" +
+                                            "   * Changes the notification mode of the channel between mentioning everyone connected (`@here`), subscribers only, or a role given to subscribers.\n" +
+                                            "* `/stats`:\n"+
+                                            "   * Shows administrators a summary of the bot's polling, database and notification metrics.\n" +
                                             "* `/help`:\n"+
                                             "   * Shows the user a list of all of this bot's commands.",
                                             ephemeral=True)
 
-BOT.run(TOKEN)
\ No newline at end of file
+if __name__ == '__main__':
+    BOT.run(TOKEN)
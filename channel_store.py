@@ -0,0 +1,113 @@
+# channel_store.py
+# In-memory copy of the channels table.
+# Reads are served from memory, while writes are queued and committed to the database in one transaction per flush.
+# Python libraries
+import time
+
+# Local modules
+import metrics
+import database
+import async_database
+
+BY_ID = {}      # id -> row as a list of values ordered like database.CHANNEL_COLUMNS
+BY_KEY = {}     # (platform, name) -> id
+PENDING = {}    # id -> {column: value} awaiting the next flush
+EVENTS = []     # (id, kind, title, url, created) state changes recorded with the next flush, for a separate notifier
+SESSIONS = []   # (id, kind, time, title, delay) changes of the stream history recorded with the next flush
+
+async def load() -> None:
+    """Loads every channel of the database into memory."""
+    rows = await async_database.read(database.get_channels)
+    BY_ID.clear()
+    BY_KEY.clear()
+    for row in rows:
+        add(row)
+
+def add(row) -> None:
+    """Adds a channel row read from the database."""
+    if (row is None):
+        return
+    BY_ID[row[0]] = list(row)
+    BY_KEY[(row[2], row[1])] = row[0]
+
+def remove(channel_id) -> None:
+    """Forgets a channel, including its pending writes."""
+    row = BY_ID.pop(channel_id, None)
+    PENDING.pop(channel_id, None)
+    SESSIONS[:] = [session for session in SESSIONS if session[0] != channel_id]
+    if (row is not None):
+        BY_KEY.pop((row[2], row[1]), None)
+
+def get(channel_id) -> tuple:
+    """
+    Gets a channel row by its id.
+    Every channel is loaded at startup and added through the store, so a miss means it doesn't exist.
+    """
+    row = BY_ID.get(channel_id)
+    if (row is None):
+        metrics.inc('store_misses')
+        return None
+    metrics.inc('store_hits')
+    return tuple(row)
+
+def get_by_name(platform, name) -> tuple:
+    """Gets a channel row by its platform and name."""
+    channel_id = BY_KEY.get((platform, name))
+    if (channel_id is None):
+        metrics.inc('store_misses')
+        return None
+    return get(channel_id)
+
+def get_channels(platform=None) -> [tuple]:
+    """Gets the cached channels, optionally only those of a platform."""
+    return [tuple(row) for row in BY_ID.values() if platform is None or row[2] == platform]
+
+def find(column, value) -> tuple:
+    """Gets the first channel row holding a value in a column."""
+    index = database.CHANNEL_COLUMNS.index(column)
+    for row in BY_ID.values():
+        if (row[index] == value):
+            return tuple(row)
+    return None
+
+def update(channel_id, column, value) -> None:
+    """Changes a value in memory and queues it to be written on the next flush."""
+    row = BY_ID.get(channel_id)
+    if (row is None):
+        return
+    index = database.CHANNEL_COLUMNS.index(column)
+    if (row[index] == value):
+        return
+    row[index] = value
+    PENDING.setdefault(channel_id, {})[column] = value
+
+def set_cached(channel_id, column, value) -> None:
+    """Changes a value in memory only, for changes another process already wrote to the database."""
+    row = BY_ID.get(channel_id)
+    if (row is not None):
+        row[database.CHANNEL_COLUMNS.index(column)] = value
+
+def queue_event(channel_id, kind, title, url) -> None:
+    """Queues a state change to be recorded along with the next flush."""
+    EVENTS.append((channel_id, kind, title, url, time.time()))
+
+def queue_session(channel_id, kind, at, title=None, delay=None) -> None:
+    """Queues a change of the stream history ('live', 'resumed' or 'offline') to be recorded along with the next flush."""
+    SESSIONS.append((channel_id, kind, at, title, delay))
+
+async def flush() -> None:
+    """Writes every pending change, state change and history change to the database in a single transaction."""
+    if (len(PENDING) < 1 and len(EVENTS) < 1 and len(SESSIONS) < 1):
+        return
+    changes = dict(PENDING)
+    events = list(EVENTS)
+    sessions = list(SESSIONS)
+    PENDING.clear()
+    EVENTS.clear()
+    SESSIONS.clear()
+    start = time.perf_counter()
+    await async_database.write(database.update_channels, changes, events, sessions)
+    elapsed = time.perf_counter() - start
+    metrics.observe('store_flush_seconds', elapsed)
+    metrics.set_gauge('store_last_flush_seconds', elapsed)
+    metrics.inc('store_flushed_rows', len(changes))
@@ -0,0 +1,85 @@
+# config.py
+# Python libraries
+import os
+import socket
+
+# External libraries
+from dotenv import load_dotenv
+
+# .env variables
+load_dotenv()
+
+# Polling engine
+YOUTUBE_URL = os.getenv('YOUTUBE_URL', 'https://www.youtube.com')           # Overridable to poll local stand-ins
+TWITCH_URL = os.getenv('TWITCH_URL', 'https://www.twitch.tv')
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 50))                  # Max simultaneous fetches overall
+POLL_CONCURRENCY_PER_HOST = int(os.getenv('POLL_CONCURRENCY_PER_HOST', 10)) # Max simultaneous fetches per host
+POLL_TIMEOUT = float(os.getenv('POLL_TIMEOUT', 15))                         # Seconds allowed per request
+POLL_CONNECT_TIMEOUT = float(os.getenv('POLL_CONNECT_TIMEOUT', 5))          # Seconds allowed to get a connection
+POLL_READ_TIMEOUT = float(os.getenv('POLL_READ_TIMEOUT', 10))               # Seconds allowed between two reads of a body
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 100000))        # Pages and check results remembered to skip unchanged ones
+POLL_RETRIES = int(os.getenv('POLL_RETRIES', 2))                            # Retries of a failed fetch
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', 0.5))                # Cap of the first retry's random delay, doubled each retry
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', 5))                    # Upper bound of the retry delay
+BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', 5))                  # Consecutive failures pausing a platform's checks
+BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', 60))                 # Seconds a platform's checks stay paused
+
+# Adaptive scheduler
+SCHEDULER_TICK = float(os.getenv('SCHEDULER_TICK', 5))        # Seconds between scheduler passes
+POLL_RATE = float(os.getenv('POLL_RATE', 5))                  # Global budget of channel checks per second
+BASE_INTERVAL = float(os.getenv('BASE_INTERVAL', 300))        # Seconds between checks of a regular channel
+MIN_INTERVAL = float(os.getenv('MIN_INTERVAL', 60))           # Seconds between checks around usual go-live times
+MAX_INTERVAL = float(os.getenv('MAX_INTERVAL', 3600))         # Upper bound for channels that stay offline
+BACKOFF_CHECKS = int(os.getenv('BACKOFF_CHECKS', 12))         # Offline checks before the interval doubles
+HOT_WINDOW = float(os.getenv('HOT_WINDOW', 1800))             # Seconds around a usual go-live time checked at MIN_INTERVAL
+WARMUP_SPREAD = float(os.getenv('WARMUP_SPREAD', 60))         # Seconds over which checks overdue after a restart are spread
+STATE_SAVE_INTERVAL = float(os.getenv('STATE_SAVE_INTERVAL', 60)) # Seconds between saves of the polling state restored on restart
+
+# Transition confirmation
+LIVE_CONFIRMATIONS = int(os.getenv('LIVE_CONFIRMATIONS', 2))      # Consecutive live checks confirming a channel went live
+OFFLINE_CONFIRMATIONS = int(os.getenv('OFFLINE_CONFIRMATIONS', 2)) # Consecutive offline checks confirming a stream ended
+CONFIRM_DELAY = float(os.getenv('CONFIRM_DELAY', 30))             # Seconds before the check confirming a change
+RENOTIFY_AFTER = float(os.getenv('RENOTIFY_AFTER', 600))          # Seconds after a stream ended during which going live again isn't notified
+
+# Stream history
+HISTORY_DAYS = float(os.getenv('HISTORY_DAYS', 30))                     # Days stream sessions are kept in full before being compacted into daily totals
+HISTORY_COMPACT_INTERVAL = float(os.getenv('HISTORY_COMPACT_INTERVAL', 3600)) # Seconds between compactions of the stream history
+
+# Database access
+DB_READERS = int(os.getenv('DB_READERS', 4))                  # Read-only connections serving queries
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')        # SQLite synchronous level, NORMAL is safe under WAL
+
+# Notification dispatch
+NOTIFY_BATCH_DELAY = float(os.getenv('NOTIFY_BATCH_DELAY', 1))        # Seconds waited to batch notices of the same channel
+NOTIFY_CHANNEL_RATE = float(os.getenv('NOTIFY_CHANNEL_RATE', 1))      # Messages per second allowed per Discord channel
+NOTIFY_CHANNEL_BURST = int(os.getenv('NOTIFY_CHANNEL_BURST', 5))      # Messages a Discord channel may receive in a burst
+NOTIFY_GLOBAL_RATE = float(os.getenv('NOTIFY_GLOBAL_RATE', 40))       # Messages per second allowed overall
+
+# Metrics
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')         # Address of the Prometheus-style endpoint
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9108))           # Port of the endpoint, 0 disables it
+WORKER_METRICS_PORT = int(os.getenv('WORKER_METRICS_PORT', 0)) # Port of a poller worker's endpoint, disabled by default as workers may share a host
+
+# Twitch Helix API, used instead of scraping channel pages when both credentials are set
+TWITCH_CLIENT_ID = os.getenv('TWITCH_CLIENT_ID')
+TWITCH_CLIENT_SECRET = os.getenv('TWITCH_CLIENT_SECRET')
+TWITCH_API_URL = os.getenv('TWITCH_API_URL', 'https://api.twitch.tv/helix')
+TWITCH_AUTH_URL = os.getenv('TWITCH_AUTH_URL', 'https://id.twitch.tv/oauth2/token')
+
+# YouTube push notifications through WebSub, enabled when the public callback url is set
+WEBSUB_CALLBACK_URL = os.getenv('WEBSUB_CALLBACK_URL')                               # Public url of the receiver, e.g. https://example.com/websub
+WEBSUB_HOST = os.getenv('WEBSUB_HOST', '0.0.0.0')                                    # Address the receiver listens on
+WEBSUB_PORT = int(os.getenv('WEBSUB_PORT', 8090))
+WEBSUB_HUB_URL = os.getenv('WEBSUB_HUB_URL', 'https://pubsubhubbub.appspot.com/subscribe')
+WEBSUB_LEASE = int(os.getenv('WEBSUB_LEASE', 432000))                                # Seconds requested per subscription (5 days)
+WEBSUB_SECRET = os.getenv('WEBSUB_SECRET', '')                                       # Shared secret signing notifications
+
+# Sharded polling. In 'local' mode the bot checks every channel itself, while in 'notifier' mode
+# it only sends the notices of state changes detected by separate worker processes (worker.py)
+POLLER_MODE = os.getenv('POLLER_MODE', 'local')
+WORKER_ID = os.getenv('WORKER_ID') or f'{socket.gethostname()}-{os.getpid()}'  # Unique name of a poller worker, an empty value uses the default
+SHARDS = int(os.getenv('SHARDS', 64))                         # Channel shards distributed between workers
+LEASE_TTL = float(os.getenv('LEASE_TTL', 30))                 # Seconds a shard lease lasts without being renewed
+LEASE_RENEW = float(os.getenv('LEASE_RENEW', 10))             # Seconds between lease renewals
+CHANNEL_RELOAD = float(os.getenv('CHANNEL_RELOAD', 60))       # Seconds between reloads of the channels table by workers
+EVENT_POLL = float(os.getenv('EVENT_POLL', 1))                # Seconds between reads of detected state changes by the notifier
@@ -1,16 +1,30 @@
-import requests
+import json
 import sqlite3
-import os
+import threading
 
+FILENAME = "livestreams.db"
 CONNECTION = None
+LOCAL = threading.local() # Connection owned by the current thread, set by the async facade's threads
+CHANNEL_COLUMNS = ('id', 'name', 'platform', 'islive', 'livetitle', 'externalid')
+TARGET_COLUMNS = ('id', 'channel_id', 'guild', 'dschannel', 'everyone', 'role')
+TABLES = ('channels', 'subscribers', 'targets')
+# Joins a JSON array of [platform, name] pairs, bound as a single parameter, with the channels they name
+NAMES_JOIN = """
+    FROM json_each(?) AS wanted
+    JOIN channels ON channels.platform = json_extract(wanted.value, '$[0]')
+        AND channels.name = json_extract(wanted.value, '$[1]')"""
 
-def execute_statement(statement) -> sqlite3.Cursor:
-    """Tries to execute given unique statement."""
-    global CONNECTION
+def get_connection() -> sqlite3.Connection:
+    """Returns the connection of the current thread, or the global one when it has none."""
+    return getattr(LOCAL, 'connection', None) or CONNECTION
+
+def execute_statement(statement, parameters=()) -> sqlite3.Cursor:
+    """Tries to execute given unique statement, binding its parameters."""
+    connection = get_connection()
     try:
-        cursor = CONNECTION.cursor()
-        cursor.execute(statement)
-        CONNECTION.commit()
+        cursor = connection.cursor()
+        cursor.execute(statement, parameters)
+        connection.commit()
         return cursor
     except sqlite3.Error as e:
         print(e)
@@ -29,9 +43,9 @@ def connect_database(filename) -> sqlite3.Connection:
         print(e)
     return conn
 
-def create_channel_table() -> None:
-    """Creates Twitch/YouTube tables in case it doesn't already exist in connected database."""
-    sql_statement = f"""
+def migration_1() -> str:
+    """Initial schema."""
+    return """
         CREATE TABLE IF NOT EXISTS channels (
                 id INTEGER PRIMARY KEY,
                 name TEXT NOT NULL UNIQUE,
@@ -41,192 +55,567 @@ def create_channel_table() -> None:
                 islive BOOLEAN NOT NULL DEFAULT FALSE,
                 livetitle TEXT,
                 deleteflag BOOLEAN NOT NULL DEFAULT FALSE);
-        """
-    execute_statement(sql_statement)
-
-def create_sub_table() -> None:
-    """Creates subscriber table in case it doesn't already exist in connected database."""
-    sql_statement = f"""
         CREATE TABLE IF NOT EXISTS subscribers (
                 id INTEGER PRIMARY KEY,
                 user_id INTEGER NOT NULL,
                 channel_id INTEGER NOT NULL);
         """
-    execute_statement(sql_statement)
 
-def add_channel(channel, platform, dschannel) -> None:
+def migration_2() -> str:
     """
-    Adds channel (row) to specified platform (table) in connected database.
-    Name must be unique.
+    Indexes subscribers by channel and makes each subscription unique.
+    The unique (user_id, channel_id) index also serves lookups by user_id.
     """
-    sql_statement = f"""
-        INSERT INTO channels (
+    return """
+        DELETE FROM subscribers
+        WHERE id NOT IN (SELECT MIN(id) FROM subscribers GROUP BY user_id, channel_id);
+        CREATE UNIQUE INDEX IF NOT EXISTS subscribers_user_channel ON subscribers (user_id, channel_id);
+        CREATE INDEX IF NOT EXISTS subscribers_channel ON subscribers (channel_id);
+        CREATE INDEX IF NOT EXISTS channels_platform ON channels (platform);
+        """
+
+def migration_3() -> str:
+    """Adds the Discord role mentioned in notices of channels in role mode."""
+    return "ALTER TABLE channels ADD COLUMN role INTEGER;"
+
+def migration_4() -> str:
+    """Adds the platform's own id of a channel, such as the 'UC...' id of YouTube channels."""
+    return "ALTER TABLE channels ADD COLUMN externalid TEXT;"
+
+def migration_5() -> str:
+    """
+    Adds the tables shared by poller workers: their heartbeats, the lease held on each shard of channels,
+    and the state changes they detect, waiting to be notified.
+    """
+    return """
+        CREATE TABLE IF NOT EXISTS workers (
+                worker TEXT PRIMARY KEY,
+                heartbeat REAL NOT NULL);
+        CREATE TABLE IF NOT EXISTS shard_leases (
+                shard INTEGER PRIMARY KEY,
+                worker TEXT NOT NULL,
+                expires REAL NOT NULL);
+        CREATE TABLE IF NOT EXISTS state_events (
+                id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                title TEXT,
+                url TEXT,
+                created REAL NOT NULL);
+        """
+
+def migration_6() -> str:
+    """
+    Separates streams from the Discord servers following them, so several servers can follow the same stream.
+    Channels keep the upstream stream and its status, unique per platform and name, while targets hold each
+    server's text channel and mention settings. Every existing channel becomes a target with the same id,
+    so subscriptions, now made to targets, keep pointing at the right rows. The server of those targets
+    is filled in by the bot once it can see their text channel.
+    """
+    return """
+        CREATE TABLE targets (
+                id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL,
+                guild INTEGER,
+                dschannel INTEGER NOT NULL,
+                everyone BOOLEAN NOT NULL DEFAULT FALSE,
+                role INTEGER);
+        INSERT INTO targets (id, channel_id, dschannel, everyone, role)
+            SELECT id, id, dschannel, everyone, role FROM channels;
+        CREATE UNIQUE INDEX targets_channel_guild ON targets (channel_id, guild);
+        CREATE INDEX targets_guild ON targets (guild);
+        CREATE TABLE streams (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                islive BOOLEAN NOT NULL DEFAULT FALSE,
+                livetitle TEXT,
+                externalid TEXT,
+                UNIQUE (platform, name));
+        INSERT INTO streams (id, name, platform, islive, livetitle, externalid)
+            SELECT id, name, platform, islive, livetitle, externalid FROM channels;
+        DROP TABLE channels;
+        ALTER TABLE streams RENAME TO channels;
+        ALTER TABLE subscribers RENAME COLUMN channel_id TO target_id;
+        """
+
+def migration_7() -> str:
+    """Adds the bot's own settings, and the polling state kept across restarts."""
+    return """
+        CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT);
+        CREATE TABLE IF NOT EXISTS poll_state (
+                channel_id INTEGER PRIMARY KEY,
+                lastcheck REAL NOT NULL,
+                misses INTEGER NOT NULL DEFAULT 0);
+        """
+
+def migration_8() -> str:
+    """
+    Adds the history of streams: a row per session, appended when a stream starts and closed when it ends,
+    and the daily totals per channel that sessions are compacted into once they are old enough.
+    """
+    return """
+        CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY,
+                channel_id INTEGER NOT NULL,
+                started REAL NOT NULL,
+                ended REAL,
+                title TEXT,
+                delay REAL);
+        CREATE INDEX IF NOT EXISTS sessions_channel_started ON sessions (channel_id, started);
+        CREATE UNIQUE INDEX IF NOT EXISTS sessions_open ON sessions (channel_id) WHERE ended IS NULL;
+        CREATE TABLE IF NOT EXISTS session_rollups (
+                channel_id INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                sessions INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                delay REAL NOT NULL,
+                delays INTEGER NOT NULL,
+                starts TEXT NOT NULL,
+                PRIMARY KEY (channel_id, day)) WITHOUT ROWID;
+        """
+
+# Schema migrations, applied in order. Each one returns its SQL script, run in the same transaction as
+# the bump of the database's user_version, which holds how many were applied.
+MIGRATIONS = [migration_1, migration_2, migration_3, migration_4, migration_5, migration_6, migration_7, migration_8]
+
+def migrate() -> None:
+    """
+    Applies every pending schema migration to the connected database, each one atomically.
+    A failed migration is rolled back and its error raised, leaving the database at the last applied version.
+    """
+    connection = get_connection()
+    version = connection.execute("PRAGMA user_version;").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        try:
+            connection.executescript(f"BEGIN; {migration()} PRAGMA user_version = {number}; COMMIT;")
+        except sqlite3.Error as e:
+            if (connection.in_transaction):
+                connection.rollback()
+            print(f"Database migration {number} failed: {e}")
+            raise
+        print(f"Applied database migration {number}.")
+
+def add_channel(channel, platform) -> None:
+    """
+    Adds the stream of a channel in specified platform to connected database.
+    A channel already followed by another server is kept as it is.
+    """
+    sql_statement = """
+        INSERT OR IGNORE INTO channels (
                 name,
-                platform,
-                dschannel
-            ) 
-            VALUES 
-                ('{channel}', '{platform}', {dschannel});
+                platform
+            )
+            VALUES
+                (?, ?);
         """
-    execute_statement(sql_statement)
+    execute_statement(sql_statement, (channel, platform))
 
-def update_int_value(table, column, value, condition_column, condition) -> None:
-    """Changes a value in the specified column and table given a condition."""
-    sql_statement = f"""
-        UPDATE {table}
-        SET {column} = {value}
-        WHERE {condition_column} = {condition};
+def add_target(channel_id, guild, dschannel) -> None:
+    """Makes a server follow a channel, notifying it in specified text channel."""
+    sql_statement = """
+        INSERT OR IGNORE INTO targets (
+                channel_id,
+                guild,
+                dschannel
+            )
+            VALUES
+                (?, ?, ?);
         """
-    execute_statement(sql_statement)
+    execute_statement(sql_statement, (channel_id, guild, dschannel))
 
-def update_str_value(table, column, value, condition_column, condition) -> None:
+def import_channels(channels, guild, dschannel) -> ([sqlite3.Row], [sqlite3.Row]):
+    """
+    Adds (platform, name) channels and makes a server follow them all, notifying it in specified text channel,
+    in a single transaction. Returns the rows of those channels and of the server's targets following them.
+    """
+    wanted = json.dumps(channels)
+    connection = get_connection()
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO channels (platform, name) VALUES (?, ?);", channels)
+            channel_rows = connection.execute(f"SELECT channels.* {NAMES_JOIN};", (wanted,)).fetchall()
+            connection.executemany(
+                "INSERT OR IGNORE INTO targets (channel_id, guild, dschannel) VALUES (?, ?, ?);",
+                [(row[0], guild, dschannel) for row in channel_rows])
+            target_rows = connection.execute(
+                f"SELECT targets.* {NAMES_JOIN} JOIN targets ON targets.channel_id = channels.id WHERE targets.guild = ?;",
+                (wanted, guild)).fetchall()
+    except sqlite3.Error as e:
+        print(e)
+        return [], []
+    return channel_rows, target_rows
+
+def update_value(table, column, value, condition_column, condition) -> None:
     """Changes a value in the specified column and table given a condition."""
+    if (table not in TABLES or not column.isidentifier() or not condition_column.isidentifier()):
+        print(f"Invalid update target {table}.{column}")
+        return
     sql_statement = f"""
         UPDATE {table}
-        SET {column} = '{value}'
-        WHERE {condition_column} = {condition};
+        SET {column} = ?
+        WHERE {condition_column} = ?;
         """
-    execute_statement(sql_statement)
+    execute_statement(sql_statement, (value, condition))
+
+def update_channels(changes, events=(), sessions=()) -> None:
+    """
+    Applies several column changes to the channels table in a single transaction.
+    changes maps each channel id to a dictionary of column -> value.
+    events are (channel_id, kind, title, url, created) state changes to record for the notifier, kind being
+    'live', 'resumed', 'offline' or 'title'. Each one is
+    only recorded if it actually flips the stored live status, so two workers detecting the same transition
+    produce a single event.
+    sessions are (channel_id, kind, time, title, delay) changes of the stream history, see record_sessions.
+    """
+    connection = get_connection()
+    try:
+        with connection:
+            for channel_id, kind, title, url, created in events:
+                if (kind == 'title'):
+                    cursor = connection.execute(
+                        "UPDATE channels SET livetitle = ? WHERE id = ? AND islive;", (title, channel_id))
+                elif (kind != 'offline'):
+                    cursor = connection.execute(
+                        "UPDATE channels SET islive = TRUE, livetitle = ? WHERE id = ? AND NOT islive;", (title, channel_id))
+                else:
+                    cursor = connection.execute(
+                        "UPDATE channels SET islive = FALSE, livetitle = NULL WHERE id = ? AND islive;", (channel_id,))
+                if (cursor.rowcount == 1):
+                    connection.execute(
+                        "INSERT INTO state_events (channel_id, kind, title, url, created) VALUES (?, ?, ?, ?, ?);",
+                        (channel_id, kind, title, url, created))
+            for channel_id, values in changes.items():
+                columns = [column for column in values if column in CHANNEL_COLUMNS]
+                if (len(columns) < 1):
+                    continue
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                connection.execute(
+                    f"UPDATE channels SET {assignments} WHERE id = ?;",
+                    [values[column] for column in columns] + [channel_id])
+            record_sessions(connection, sessions)
+    except sqlite3.Error as e:
+        print(e)
+
+def record_sessions(connection, sessions) -> None:
+    """
+    Records (channel_id, kind, time, title, delay) changes of the stream history within the current transaction.
+    'live' opens a session, 'offline' closes the open one, and 'resumed' reopens the last one.
+    A channel has at most one open session, so the same change recorded twice by two workers is only applied once.
+    """
+    for channel_id, kind, at, title, delay in sessions:
+        if (kind == 'live'):
+            connection.execute(
+                "INSERT OR IGNORE INTO sessions (channel_id, started, title, delay) VALUES (?, ?, ?, ?);",
+                (channel_id, at, title, delay))
+        elif (kind == 'offline'):
+            connection.execute(
+                "UPDATE sessions SET ended = MAX(?, started) WHERE channel_id = ? AND ended IS NULL;", (at, channel_id))
+        elif (kind == 'resumed'):
+            connection.execute("""
+                UPDATE OR IGNORE sessions SET ended = NULL
+                WHERE id = (SELECT id FROM sessions WHERE channel_id = ? ORDER BY started DESC LIMIT 1);
+                """, (channel_id,))
 
 def remove_channel(id) -> None:
-    """Removes specified channel from table."""
-    sql_statement = f"""
-        DELETE FROM channels
-        WHERE id = {id};
-        """
-    execute_statement(sql_statement)
+    """Removes specified channel from table, along with its stream history."""
+    connection = get_connection()
+    try:
+        with connection:
+            connection.execute("DELETE FROM sessions WHERE channel_id = ?;", (id,))
+            connection.execute("DELETE FROM session_rollups WHERE channel_id = ?;", (id,))
+            connection.execute("DELETE FROM channels WHERE id = ?;", (id,))
+    except sqlite3.Error as e:
+        print(e)
 
 def get_channels(platform=None) -> [sqlite3.Row]:
     """Gets list of channels in specified platform (table)."""
-    sql_statement = f"""
-        SELECT *
-        FROM channels
-        """
-    if (platform != None):
-        sql_statement += f"""
-        WHERE platform = '{platform}'
-        """
-    sql_statement += ";"
-    cursor = execute_statement(sql_statement)
+    if (platform is None):
+        cursor = execute_statement("SELECT * FROM channels;")
+    else:
+        cursor = execute_statement("SELECT * FROM channels WHERE platform = ?;", (platform,))
     rows = cursor.fetchall()
     return rows
 
-def get_channel(id) -> sqlite3.Row:
-    """Gets data of channel by its id"""
-    sql_statement = f"""
+def get_channel_by_name(platform, name) -> sqlite3.Row:
+    """Gets data of channel by its platform and name"""
+    sql_statement = """
         SELECT *
         FROM channels
-        WHERE id = {id};
+        WHERE platform = ? AND name = ?;
         """
-    cursor = execute_statement(sql_statement)
-    rows = cursor.fetchall()
-    row = rows[0] if len(rows) > 0 else None
-    return row
+    cursor = execute_statement(sql_statement, (platform, name))
+    return cursor.fetchone()
 
-def get_channel_by_name(name) -> sqlite3.Row:
-    """Gets data of channel by its name"""
-    sql_statement = f"""
+def get_channels_by_names(channels) -> [sqlite3.Row]:
+    """Gets the rows of the (platform, name) channels already in the table, with a single query."""
+    cursor = execute_statement(f"SELECT channels.* {NAMES_JOIN};", (json.dumps(channels),))
+    return cursor.fetchall() if cursor is not None else []
+
+def get_targets() -> [sqlite3.Row]:
+    """Gets every server following a channel."""
+    cursor = execute_statement("SELECT * FROM targets;")
+    return cursor.fetchall()
+
+def get_target(channel_id, guild) -> sqlite3.Row:
+    """Gets the target of a channel in a server."""
+    sql_statement = """
         SELECT *
-        FROM channels
-        WHERE name = '{name}';
+        FROM targets
+        WHERE channel_id = ? AND guild = ?;
         """
-    cursor = execute_statement(sql_statement)
-    rows = cursor.fetchall()
-    row = rows[0] if len(rows) > 0 else None
-    return row
+    cursor = execute_statement(sql_statement, (channel_id, guild))
+    return cursor.fetchone()
 
-def get_subs(id) -> [sqlite3.Row]:
-    """Get the list of subscribers of a specified channel."""
-    sql_statement = f"""
-        SELECT *
+def remove_target(id) -> None:
+    """Stops a server from following a channel, removing its subscriptions too."""
+    connection = get_connection()
+    try:
+        with connection:
+            connection.execute("DELETE FROM subscribers WHERE target_id = ?;", (id,))
+            connection.execute("DELETE FROM targets WHERE id = ?;", (id,))
+    except sqlite3.Error as e:
+        print(e)
+
+def get_subs(id) -> [int]:
+    """Get the list of subscribers of a specified target."""
+    sql_statement = """
+        SELECT user_id
         FROM subscribers
-        WHERE channel_id = {id};
+        WHERE target_id = ?;
         """
-    cursor = execute_statement(sql_statement)
-    subs = [sub[1] for sub in cursor.fetchall()]
+    cursor = execute_statement(sql_statement, (id,))
+    subs = [sub[0] for sub in cursor.fetchall()]
     return subs
 
-def remove_subs(channel_id) -> None:
-    """Removes all subscribers for specified channel."""
-    sql_statement = f"""
-        DELETE FROM subscribers
-        WHERE (channel_id = {channel_id});
-        """
-    execute_statement(sql_statement)
+def get_all_subs() -> [sqlite3.Row]:
+    """Get every (user_id, target_id) subscription."""
+    cursor = execute_statement("SELECT user_id, target_id FROM subscribers;")
+    return cursor.fetchall()
 
 def get_subd(user_id) -> [sqlite3.Row]:
-    """Get the list of subscribed channels of a user."""
-    sql_statement = f"""
-        SELECT channel_id
+    """Get the list of (target id, channel name) subscribed to by a user."""
+    sql_statement = """
+        SELECT targets.id, channels.name
         FROM subscribers
-        WHERE user_id = {user_id};
-        """
-    cursor = execute_statement(sql_statement)
-    channel_ids = [row[0] for row in cursor.fetchall()]
-    if (len(channel_ids) < 1):
-        return None
-    id_string = str(channel_ids[0])
-    for id in channel_ids[1:]:
-        id_string += ", " + str(id)
-
-    sql_statement = f"""
-        SELECT id, name
-        FROM channels
-        WHERE id IN ({id_string});
+        JOIN targets ON targets.id = subscribers.target_id
+        JOIN channels ON channels.id = targets.channel_id
+        WHERE subscribers.user_id = ?;
         """
-    cursor = execute_statement(sql_statement)
+    cursor = execute_statement(sql_statement, (user_id,))
     channels = cursor.fetchall()
     return channels
 
 def get_unsubd(user_id) -> [sqlite3.Row]:
-    """Get the list of unsubscribed channels of a user."""
-    sql_statement = f"""
-        SELECT channel_id
-        FROM subscribers
-        WHERE user_id = {user_id};
-        """
-    cursor = execute_statement(sql_statement)
-    channel_ids = [row[0] for row in cursor.fetchall()]
-    id_string = ""
-    if (len(channel_ids) > 0):
-        id_string = str(channel_ids[0])
-        for id in channel_ids[1:]:
-            id_string += ", " + str(id)
-
-    sql_statement = f"""
-        SELECT id, name
-        FROM channels
-        WHERE id NOT IN ({id_string});
+    """Get the list of (target id, channel name) not subscribed to by a user."""
+    sql_statement = """
+        SELECT targets.id, channels.name
+        FROM targets
+        JOIN channels ON channels.id = targets.channel_id
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM subscribers
+            WHERE subscribers.user_id = ? AND subscribers.target_id = targets.id);
         """
-    cursor = execute_statement(sql_statement)
+    cursor = execute_statement(sql_statement, (user_id,))
     channels = cursor.fetchall()
     return channels
 
-def add_sub(user_id, channel_id) -> None:
-    """Adds subscriber for specified channel."""
-    sql_statement = f"""
-        INSERT INTO subscribers (
+def add_sub(user_id, target_id) -> None:
+    """Adds subscriber for specified target. Repeated subscriptions are ignored."""
+    sql_statement = """
+        INSERT OR IGNORE INTO subscribers (
                 user_id,
-                channel_id
-            ) 
-            VALUES 
-                ({user_id}, {channel_id});
+                target_id
+            )
+            VALUES
+                (?, ?);
         """
-    execute_statement(sql_statement)
+    execute_statement(sql_statement, (user_id, target_id))
 
-def remove_sub(user_id, channel_id) -> None:
-    """Removes subscriber for specified channel."""
-    sql_statement = f"""
+def remove_sub(user_id, target_id) -> None:
+    """Removes subscriber for specified target."""
+    sql_statement = """
         DELETE FROM subscribers
-        WHERE (user_id = {user_id} AND channel_id = {channel_id});
+        WHERE user_id = ? AND target_id = ?;
         """
-    execute_statement(sql_statement)
+    execute_statement(sql_statement, (user_id, target_id))
+
+def heartbeat(worker, now) -> None:
+    """Records that a poller worker is alive."""
+    execute_statement("INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?);", (worker, now))
+
+def remove_worker(worker) -> None:
+    """Forgets a poller worker that stopped."""
+    execute_statement("DELETE FROM workers WHERE worker = ?;", (worker,))
+
+def get_workers(since) -> [str]:
+    """Gets the poller workers whose last heartbeat is more recent than given time."""
+    cursor = execute_statement("SELECT worker FROM workers WHERE heartbeat >= ?;", (since,))
+    return [row[0] for row in cursor.fetchall()]
+
+def acquire_leases(worker, shards, expires, now) -> [int]:
+    """
+    Takes or renews the lease of each given shard, unless another worker holds a lease that hasn't expired.
+    Returns the shards leased to the worker.
+    """
+    acquired = []
+    connection = get_connection()
+    try:
+        with connection:
+            for shard in shards:
+                connection.execute(
+                    "INSERT OR IGNORE INTO shard_leases (shard, worker, expires) VALUES (?, ?, ?);",
+                    (shard, worker, expires))
+                cursor = connection.execute(
+                    "UPDATE shard_leases SET worker = ?, expires = ? WHERE shard = ? AND (worker = ? OR expires < ?);",
+                    (worker, expires, shard, worker, now))
+                if (cursor.rowcount == 1):
+                    acquired.append(shard)
+    except sqlite3.Error as e:
+        print(e)
+        return []
+    return acquired
+
+def release_leases(worker, shards) -> None:
+    """Lets the leases of given shards expire right away, so other workers can take them."""
+    connection = get_connection()
+    try:
+        with connection:
+            connection.executemany(
+                "UPDATE shard_leases SET expires = 0 WHERE shard = ? AND worker = ?;",
+                [(shard, worker) for shard in shards])
+    except sqlite3.Error as e:
+        print(e)
+
+def take_events(limit) -> [sqlite3.Row]:
+    """
+    Removes and returns the oldest recorded state changes, as (id, channel_id, kind, title, url, created) rows.
+    Each event is handed out once, even if it is never notified.
+    """
+    connection = get_connection()
+    try:
+        with connection:
+            events = connection.execute(
+                "SELECT id, channel_id, kind, title, url, created FROM state_events ORDER BY id LIMIT ?;",
+                (limit,)).fetchall()
+            if (len(events) > 0):
+                connection.execute("DELETE FROM state_events WHERE id <= ?;", (events[-1][0],))
+    except sqlite3.Error as e:
+        print(e)
+        return []
+    return events
+
+def compact_sessions(before) -> int:
+    """
+    Folds the sessions that ended before a time.time() into daily totals per channel, in a single transaction.
+    Returns how many sessions were compacted.
+    """
+    connection = get_connection()
+    try:
+        with connection:
+            connection.execute("""
+                INSERT INTO session_rollups (channel_id, day, sessions, seconds, delay, delays, starts)
+                    SELECT channel_id, CAST(started / 86400 AS INTEGER), COUNT(*), TOTAL(ended - started),
+                        TOTAL(delay), COUNT(delay), GROUP_CONCAT(CAST(started % 86400 AS INTEGER))
+                    FROM sessions
+                    WHERE ended < ?
+                    GROUP BY channel_id, CAST(started / 86400 AS INTEGER)
+                    ORDER BY 1, 2
+                ON CONFLICT (channel_id, day) DO UPDATE SET
+                    sessions = sessions + excluded.sessions,
+                    seconds = seconds + excluded.seconds,
+                    delay = delay + excluded.delay,
+                    delays = delays + excluded.delays,
+                    starts = starts || ',' || excluded.starts;
+                """, (before,))
+            return connection.execute("DELETE FROM sessions WHERE ended < ?;", (before,)).rowcount
+    except sqlite3.Error as e:
+        print(e)
+        return 0
+
+def get_sessions(channel_id, limit) -> [sqlite3.Row]:
+    """Gets the (started, ended, title, delay) latest sessions of a channel, most recent first."""
+    sql_statement = """
+        SELECT started, ended, title, delay
+        FROM sessions
+        WHERE channel_id = ?
+        ORDER BY started DESC
+        LIMIT ?;
+        """
+    cursor = execute_statement(sql_statement, (channel_id, limit))
+    return cursor.fetchall() if cursor is not None else []
+
+def get_session_totals(channel_id, since, now) -> sqlite3.Row:
+    """
+    Gets the (sessions, live seconds, detection delay total, sessions with a delay, first day) of a channel
+    since a time.time(), from its sessions and the daily totals they were compacted into.
+    Open sessions count as lasting until now.
+    """
+    sql_statement = """
+        SELECT SUM(sessions), TOTAL(seconds), TOTAL(delay), SUM(delays), MIN(day)
+        FROM (
+            SELECT sessions, seconds, delay, delays, day
+            FROM session_rollups
+            WHERE channel_id = ? AND day >= CAST(? / 86400 AS INTEGER)
+            UNION ALL
+            SELECT 1, COALESCE(ended, ?) - started, COALESCE(delay, 0), delay IS NOT NULL, CAST(started / 86400 AS INTEGER)
+            FROM sessions
+            WHERE channel_id = ? AND started >= ?);
+        """
+    cursor = execute_statement(sql_statement, (channel_id, since, now, channel_id, since))
+    return cursor.fetchone() if cursor is not None else None
+
+def get_live_starts(since) -> [sqlite3.Row]:
+    """
+    Gets the (channel_id, day, starts) go-live times of every channel since a time.time(), oldest first,
+    starts being the comma separated seconds since midnight (UTC) of the streams started that day.
+    """
+    sql_statement = """
+        SELECT channel_id, day, starts
+        FROM session_rollups
+        WHERE day >= CAST(? / 86400 AS INTEGER)
+        UNION ALL
+        SELECT channel_id, CAST(started / 86400 AS INTEGER), CAST(CAST(started % 86400 AS INTEGER) AS TEXT)
+        FROM sessions
+        WHERE started >= ?
+        ORDER BY 2;
+        """
+    cursor = execute_statement(sql_statement, (since, since))
+    return cursor.fetchall() if cursor is not None else []
+
+def get_setting(key) -> str:
+    """Gets a value saved by the bot, or None."""
+    cursor = execute_statement("SELECT value FROM settings WHERE key = ?;", (key,))
+    row = cursor.fetchone() if cursor is not None else None
+    return row[0] if row is not None else None
+
+def set_setting(key, value) -> None:
+    execute_statement("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?);", (key, value))
+
+def get_poll_state() -> [sqlite3.Row]:
+    """Gets the (channel_id, lastcheck, misses) polling state saved for every channel."""
+    cursor = execute_statement("SELECT channel_id, lastcheck, misses FROM poll_state;")
+    return cursor.fetchall()
+
+def save_poll_state(states) -> None:
+    """Saves (channel_id, lastcheck, misses) polling states in a single transaction, dropping those of removed channels."""
+    connection = get_connection()
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO poll_state (channel_id, lastcheck, misses) VALUES (?, ?, ?);", states)
+            connection.execute("DELETE FROM poll_state WHERE channel_id NOT IN (SELECT id FROM channels);")
+    except sqlite3.Error as e:
+        print(e)
 
 def init_connection():
     global CONNECTION
-    CONNECTION = connect_database("livestreams.db")
+    CONNECTION = connect_database(FILENAME)
+    migrate()
 
 if __name__ == '__main__':
     init_connection()
-    create_channel_table()
-    create_sub_table()
\ No newline at end of file
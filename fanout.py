@@ -0,0 +1,36 @@
+# fanout.py
+# Builds the mention part of go-live notices, split across messages that fit Discord's size limit.
+# Local modules
+import database
+import async_database
+from notifier import MESSAGE_LIMIT
+
+MENTIONS = {} # Target id -> rendered subscriber mentions, dropped whenever its subscriptions change
+TITLE_LIMIT = 300 # Characters of a stream title kept in the notice header
+
+async def get_mentions(target_id) -> [str]:
+    """Gets the rendered mentions of a target's subscribers, reading them from the database only once."""
+    mentions = MENTIONS.get(target_id)
+    if (mentions is None):
+        subs = await async_database.read(database.get_subs, target_id)
+        mentions = MENTIONS[target_id] = [f"<@{sub}>; " for sub in subs]
+    return mentions
+
+def invalidate(target_id) -> None:
+    """Forgets the rendered mentions of a target after its subscriptions changed."""
+    MENTIONS.pop(target_id, None)
+
+def split_mentions(header, mentions, limit=MESSAGE_LIMIT) -> [str]:
+    """
+    Packs mentions into as few messages as possible, each one within the size limit.
+    The first message starts with the header, and every message is italicized like the original notice.
+    """
+    messages = []
+    current = header + "*Subscribers:  "
+    for mention in mentions:
+        if (len(current) + len(mention) + 1 > limit): # Room for the closing '*'
+            messages.append(current + "*")
+            current = "*"
+        current += mention
+    messages.append(current + "*")
+    return messages
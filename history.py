@@ -0,0 +1,66 @@
+# history.py
+# History of each channel's streams. A session is recorded when a stream starts and closed when it ends,
+# with the polling cycle's other changes, and sessions older than HISTORY_DAYS are compacted into daily totals.
+# Python libraries
+import time
+
+# Local modules
+import config
+import metrics
+import database
+import transitions
+import channel_store
+import async_database
+from scheduler import DAY, MAX_STARTS
+
+STARTS_WINDOW = 90 * DAY    # Seconds of history the go-live times given to the scheduler are read from
+REPORT_DAYS = 30            # Days summed up separately by /history
+REPORT_SESSIONS = 10        # Latest sessions listed by /history
+TITLE_LIMIT = 100           # Characters of a session's title shown by /history
+
+STARTS = {}         # Channel id -> go-live times (seconds since midnight, UTC) read at startup, oldest first
+LAST_COMPACT = 0.0  # time.monotonic() of the last compaction
+
+def record(channel_id, key, verdict, title) -> None:
+    """
+    Queues the change of a channel's history matching a confirmed transition.
+    A session starts and ends when its change was first seen, and its detection delay is the time between
+    the last check that saw the channel offline and the confirmation, the longest the stream may have gone unnoticed.
+    """
+    if (verdict not in ('live', 'resumed', 'offline')):
+        return
+    now = time.time()
+    first_seen, last_seen = transitions.timing(key)
+    if (verdict == 'live'):
+        delay = now - last_seen if last_seen is not None else None
+        channel_store.queue_session(channel_id, verdict, first_seen or now, title, delay)
+    else:
+        channel_store.queue_session(channel_id, verdict, first_seen or now)
+
+async def load_starts() -> None:
+    """Reads the latest go-live times of every channel from the last STARTS_WINDOW seconds of history."""
+    STARTS.clear()
+    for channel_id, day, starts in await async_database.read(database.get_live_starts, time.time() - STARTS_WINDOW):
+        STARTS.setdefault(channel_id, []).extend(float(start) for start in starts.split(","))
+    for channel_id, starts in STARTS.items():
+        del starts[:-MAX_STARTS]
+
+async def maintain() -> None:
+    """Compacts the sessions older than HISTORY_DAYS into daily totals, every HISTORY_COMPACT_INTERVAL seconds."""
+    global LAST_COMPACT
+    if (time.monotonic() - LAST_COMPACT < config.HISTORY_COMPACT_INTERVAL):
+        return
+    LAST_COMPACT = time.monotonic()
+    compacted = await async_database.write(database.compact_sessions, time.time() - config.HISTORY_DAYS * DAY)
+    metrics.inc('sessions_compacted', compacted)
+
+async def get_history(channel_id) -> (list, tuple, tuple):
+    """
+    Gets the latest sessions of a channel as (started, ended, title, delay) rows, and the
+    (sessions, live seconds, delay total, sessions with a delay, first day) totals of the last REPORT_DAYS and of all time.
+    """
+    now = time.time()
+    sessions = await async_database.read(database.get_sessions, channel_id, REPORT_SESSIONS)
+    recent = await async_database.read(database.get_session_totals, channel_id, now - REPORT_DAYS * DAY, now)
+    overall = await async_database.read(database.get_session_totals, channel_id, 0, now)
+    return sessions, recent, overall
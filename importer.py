@@ -0,0 +1,128 @@
+# importer.py
+# Bulk registration of channels listed in a file, and the file listing the channels a server follows.
+# Entries are checked against the platforms concurrently, and every valid one is added in a single transaction.
+# Python libraries
+import re
+import io
+import csv
+import asyncio
+
+# Local modules
+import config
+import poller
+import monitor
+import listing
+import database
+import autocomplete
+import channel_store
+import target_store
+import async_database
+from scanner import YouTubeScanner, TwitchScanner
+
+IMPORT_LIMIT = 1000         # Entries accepted in a single file
+FILE_LIMIT = 256 * 1024     # Bytes accepted in a single file
+HEADER = ["platform", "channel"]
+PLATFORMS = {"youtube": "YouTube", "twitch": "Twitch"}
+NAME_PATTERN = re.compile(r"[\w.\-]{1,100}")
+URL_PATTERN = re.compile(r"(?:https?://)?(?:www\.|m\.)?(youtube\.com/@|twitch\.tv/)([^/?#\s]+)", re.IGNORECASE)
+
+def parse_entry(fields, platform=None) -> ((str, str), str):
+    """
+    Reads a (platform, name) entry from the fields of a line: a platform and a channel,
+    or a channel alone, in which case platform is used. Channels may be given as urls or '@handles'.
+    Returns the entry, or None and the reason it couldn't be read.
+    """
+    fields = [field.strip() for field in fields if field.strip() != ""]
+    if (len(fields) == 1):
+        url = URL_PATTERN.match(fields[0])
+        if (url is not None):
+            platform = "YouTube" if url.group(1).lower().startswith("youtube") else "Twitch"
+            fields = [platform, url.group(2)]
+        elif (platform is None):
+            return None, "no platform given"
+        else:
+            fields = [platform, fields[0]]
+    if (len(fields) != 2):
+        return None, "expected a platform and a channel"
+    platform = PLATFORMS.get(fields[0].lower())
+    name = fields[1].removeprefix("@")
+    if (platform is None):
+        return None, "unsupported platform"
+    if (NAME_PATTERN.fullmatch(name) is None):
+        return None, "invalid channel name"
+    return (platform, name), None
+
+def parse(text, platform=None) -> ([(str, str)], [(str, str)]):
+    """
+    Reads the (platform, name) entries of a CSV or newline separated file, without duplicates.
+    Returns the entries, and (line, reason) for the lines that couldn't be read or went over IMPORT_LIMIT.
+    """
+    entries, failures = {}, []
+    for fields in csv.reader(io.StringIO(text)):
+        line = ",".join(fields).strip()
+        if (line == "" or [field.strip().lower() for field in fields] == HEADER):
+            continue
+        entry, reason = parse_entry(fields, platform)
+        if (entry is None):
+            failures.append((line, reason))
+        elif (entry not in entries and len(entries) >= IMPORT_LIMIT):
+            failures.append((line, f"over the {IMPORT_LIMIT} channels accepted per file"))
+        else:
+            entries[entry] = True
+    return list(entries), failures
+
+async def validate(platform, name) -> str:
+    """Fetches the page of a channel, returning why it can't be added, or None if it exists."""
+    if (platform == "YouTube"):
+        url, scanner = f'{config.YOUTUBE_URL}/@{name}/live', YouTubeScanner()
+    else:
+        url, scanner = f'{config.TWITCH_URL}/{name}', TwitchScanner()
+    try:
+        await poller.scan(url, scanner)
+    except poller.CircuitOpen:
+        return f"{platform} can't be reached right now"
+    except poller.FetchError as e:
+        return "page couldn't be loaded" if e.retryable else "channel not found"
+    except Exception as e:
+        return f"page couldn't be loaded ({e.__class__.__name__})"
+    return None if scanner.exists() else "channel not found"
+
+async def import_channels(entries, guild, dschannel) -> (int, int, [(str, str)]):
+    """
+    Makes a server follow (platform, name) channels, notifying it in specified text channel.
+    Channels nobody follows yet are checked against their platform first, all at once.
+    Returns how many channels were added, how many the server already followed, and (entry, reason) failures.
+    """
+    existing = {(row[2], row[1]): row for row in await async_database.read(database.get_channels_by_names, entries)}
+    followed = {entry for entry, row in existing.items() if target_store.find(row[0], guild) is not None}
+    unknown = [entry for entry in entries if entry not in existing]
+    reasons = await asyncio.gather(*(validate(*entry) for entry in unknown))
+    failures = [(f"{platform},{name}", reason) for (platform, name), reason in zip(unknown, reasons) if reason is not None]
+    valid = [entry for entry in existing if entry not in followed]
+    valid += [entry for entry, reason in zip(unknown, reasons) if reason is None]
+    if (len(valid) < 1):
+        return 0, len(followed), failures
+    channel_rows, target_rows = await async_database.write(database.import_channels, valid, guild, dschannel)
+    for row in channel_rows:
+        if (channel_store.get(row[0]) is None):
+            channel_store.add(row)
+            monitor.schedule(row)
+    added = 0
+    for row in target_rows:
+        if (target_store.get(row[0]) is None):
+            target_store.add(row)
+            autocomplete.add_channel(row[0], channel_store.get(row[1])[1], guild, build=False)
+            added += 1
+    autocomplete.build_guild(guild)
+    listing.invalidate_guild(guild)
+    return added, len(followed), failures
+
+def export(guild) -> str:
+    """Lists the channels a server follows as a CSV file that /import reads back."""
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(HEADER)
+    rows = [channel_store.get(target_row[1]) for target_row in target_store.for_guild(guild)]
+    for row in sorted((row for row in rows if row is not None), key=lambda row: (row[2], row[1].lower())):
+        writer.writerow([row[2], row[1]])
+    return output.getvalue()
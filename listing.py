@@ -0,0 +1,84 @@
+# listing.py
+# Pre-rendered pages of the /channels command.
+# Each channel's line is rendered once and only rebuilt when its live status or title changes,
+# while the pages of a server are packed from those lines on first use and dropped whenever one of them changes.
+# Local modules
+import channel_store
+import target_store
+from notifier import MESSAGE_LIMIT
+
+TITLE_LIMIT = 200   # Characters of a stream title kept in a channel's line
+FOOTER_ROOM = 40    # Characters left at the end of each page for the page counter
+URLS = {"YouTube": "https://www.youtube.com/@{name}/live", "Twitch": "https://www.twitch.tv/{name}"}
+
+LINES = {} # Channel id -> rendered line
+PAGES = {} # (guild id, platform, live only) -> list of rendered pages
+
+def remove_urls(title) -> str:
+    """Removes any urls present in a livestream's title."""
+    if (title.find('http') > 0):
+        final = ""
+        split = title.split('http')
+        if (len(split[0]) > 0):
+            final += split[0][:-1]
+        if (split[1].find(' ') > 0):
+            final += split[1].split(' ')[1]
+    else:
+        final = title
+    return final
+
+def render_line(row) -> str:
+    """Renders the line of a channel row: its name, and a link to its stream while it is live."""
+    ch_id, name, platform, status, title = row[:5]
+    if (not status):
+        return f"\n* **{name}**: offline"
+    url = URLS[platform].format(name=name)
+    return f"\n* **{name}**: [{remove_urls(title or '')[:TITLE_LIMIT]}](<{url}>)"
+
+def get_line(row) -> str:
+    line = LINES.get(row[0])
+    if (line is None):
+        line = LINES[row[0]] = render_line(row)
+    return line
+
+def invalidate_guild(guild) -> None:
+    """Drops the pages of a server, after it started or stopped following a channel."""
+    for key in [key for key in PAGES if key[0] == guild]:
+        del PAGES[key]
+
+def refresh_channel(channel_id) -> None:
+    """Rebuilds the line of a channel whose status or title changed, and drops the pages showing it."""
+    LINES.pop(channel_id, None)
+    row = channel_store.get(channel_id)
+    if (row is None):
+        return
+    for target_row in target_store.for_channel(channel_id):
+        for live_only in (False, True):
+            PAGES.pop((target_row[2], row[2], live_only), None)
+
+def remove_channel(channel_id) -> None:
+    LINES.pop(channel_id, None)
+
+def get_pages(guild, platform, live_only=False) -> [str]:
+    """Gets the pages listing the channels of a platform a server follows, rendering them if needed."""
+    key = (guild, platform, live_only)
+    pages = PAGES.get(key)
+    if (pages is not None):
+        return pages
+    rows = [channel_store.get(target_row[1]) for target_row in target_store.for_guild(guild)]
+    rows = sorted((row for row in rows if row is not None and row[2] == platform and (row[3] or not live_only)),
+                  key=lambda row: row[1].lower())
+    header = "# Live channels:" if live_only else "# Channels:"
+    pages = []
+    current = header
+    for row in rows:
+        line = get_line(row)
+        if (len(current) + len(line) > MESSAGE_LIMIT - FOOTER_ROOM):
+            pages.append(current)
+            current = header
+        current += line
+    if (len(rows) < 1):
+        current += "\n* No live channel." if live_only else "\n* No channel registered."
+    pages.append(current)
+    PAGES[key] = pages
+    return pages
@@ -0,0 +1,187 @@
+# metrics.py
+# Counters and latency histograms of the poller, database and notifications,
+# exposed as Prometheus-style text and summarized by the /stats command.
+# Python libraries
+import time
+
+# Local module
+import config
+
+# External libraries
+from aiohttp import web
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300) # Seconds
+SLOWEST_KEPT = 10
+
+COUNTERS = {}   # (name, labels) -> value
+GAUGES = {}     # (name, labels) -> value
+HISTOGRAMS = {} # (name, labels) -> Histogram
+SLOWEST = {}    # (platform, channel name) -> seconds taken by its last check
+STARTED = time.time()
+RUNNER = None
+
+class Histogram:
+    """Cumulative histogram of observed values."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for index, bound in enumerate(BUCKETS):
+            if (value <= bound):
+                self.counts[index] += 1
+
+    def quantile(self, fraction) -> float:
+        """Upper bound of the bucket holding the given fraction of the observations."""
+        if (self.count < 1):
+            return 0.0
+        target = self.count * fraction
+        for index, bound in enumerate(BUCKETS):
+            if (self.counts[index] >= target):
+                return bound
+        return self.max
+
+def key(name, labels) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+def inc(name, value=1, **labels) -> None:
+    """Increases a counter."""
+    metric = key(name, labels)
+    COUNTERS[metric] = COUNTERS.get(metric, 0) + value
+
+def set_gauge(name, value, **labels) -> None:
+    GAUGES[key(name, labels)] = value
+
+def raise_gauge(name, value, **labels) -> None:
+    """Sets a gauge to a value if it is higher, keeping the peak."""
+    metric = key(name, labels)
+    GAUGES[metric] = max(GAUGES.get(metric, value), value)
+
+def observe(name, seconds, **labels) -> None:
+    """Records a duration in a latency histogram."""
+    metric = key(name, labels)
+    histogram = HISTOGRAMS.get(metric)
+    if (histogram is None):
+        histogram = HISTOGRAMS[metric] = Histogram()
+    histogram.observe(seconds)
+
+def observe_check(platform, name, seconds) -> None:
+    """Records how long a channel check took, keeping only the slowest channels."""
+    SLOWEST[(platform, name)] = seconds
+    if (len(SLOWEST) > SLOWEST_KEPT * 2):
+        for slow_key in sorted(SLOWEST, key=SLOWEST.get)[:-SLOWEST_KEPT]:
+            del SLOWEST[slow_key]
+
+def get_histogram(name, **labels) -> Histogram:
+    return HISTOGRAMS.get(key(name, labels), Histogram())
+
+def format_labels(labels, extra=()) -> str:
+    pairs = list(labels) + list(extra)
+    if (len(pairs) < 1):
+        return ""
+    return "{" + ",".join(f'{label}="{value}"' for label, value in pairs) + "}"
+
+def render() -> str:
+    """Renders every metric in the Prometheus text exposition format."""
+    lines = []
+    for (name, labels), value in sorted(COUNTERS.items()):
+        lines.append(f"livestream_{name}_total{format_labels(labels)} {value}")
+    for (name, labels), value in sorted(GAUGES.items()):
+        lines.append(f"livestream_{name}{format_labels(labels)} {value}")
+    for (name, labels), histogram in sorted(HISTOGRAMS.items(), key=lambda item: item[0]):
+        for bound, count in zip(BUCKETS, histogram.counts):
+            lines.append(f"livestream_{name}_bucket{format_labels(labels, [('le', bound)])} {count}")
+        lines.append(f"livestream_{name}_bucket{format_labels(labels, [('le', '+Inf')])} {histogram.count}")
+        lines.append(f"livestream_{name}_sum{format_labels(labels)} {histogram.sum}")
+        lines.append(f"livestream_{name}_count{format_labels(labels)} {histogram.count}")
+    lines.append(f"livestream_uptime_seconds {time.time() - STARTED:.0f}")
+    return "\n".join(lines) + "\n"
+
+def summary() -> str:
+    """Short human-readable digest of the metrics, for the /stats command."""
+    lines = ["# Stats"]
+    cycle = get_histogram('poll_cycle_seconds')
+    interval = GAUGES.get(key('poll_interval_seconds', {}), config.SCHEDULER_TICK)
+    lines.append(f"* **Polling cycles**: {cycle.count}, mean {cycle.sum / max(cycle.count, 1):.2f}s, "
+                 f"max {cycle.max:.2f}s (interval {interval:.0f}s)")
+    for platform in ('YouTube', 'Twitch'):
+        fetch = get_histogram('fetch_seconds', platform=platform)
+        parse = get_histogram('parse_seconds', platform=platform)
+        downloaded = COUNTERS.get(key('downloaded_bytes', {'platform': platform}), 0)
+        lines.append(f"* **{platform}**: {fetch.count} fetches, p50 ≤{fetch.quantile(0.5)}s, p99 ≤{fetch.quantile(0.99)}s, "
+                     f"{downloaded / 1048576:.1f} MiB downloaded, {parse.sum * 1000 / max(parse.count, 1):.2f}ms mean parse")
+        retries = COUNTERS.get(key('fetch_retries', {'platform': platform}), 0)
+        failures = COUNTERS.get(key('check_failures', {'platform': platform}), 0)
+        skipped = COUNTERS.get(key('checks_skipped', {'platform': platform}), 0)
+        if (retries + failures + skipped > 0):
+            circuit = " (checks paused)" if GAUGES.get(key('circuit_open', {'platform': platform})) else ""
+            lines.append(f"  * {retries} retries, {failures} failed checks, {skipped} skipped checks{circuit}")
+    for platform in ('YouTube', 'Twitch'):
+        conditional = COUNTERS.get(key('conditional_requests', {'platform': platform}), 0)
+        not_modified = COUNTERS.get(key('not_modified', {'platform': platform}), 0)
+        unchanged = COUNTERS.get(key('results_unchanged', {'platform': platform}), 0)
+        changed = COUNTERS.get(key('results_changed', {'platform': platform}), 0)
+        if (unchanged + changed > 0):
+            lines.append(f"* **{platform} cache**: {not_modified}/{conditional} conditional requests not modified, "
+                         f"{unchanged * 100 / (unchanged + changed):.0f}% of results unchanged and skipped")
+    hits = COUNTERS.get(key('store_hits', {}), 0)
+    misses = COUNTERS.get(key('store_misses', {}), 0)
+    flushes = get_histogram('store_flush_seconds')
+    last_flush = GAUGES.get(key('store_last_flush_seconds', {}), 0.0)
+    lines.append(f"* **Channel store**: {hits} hits, {misses} misses, {flushes.count} flushes "
+                 f"({flushes.sum * 1000 / max(flushes.count, 1):.2f}ms mean, last {last_flush * 1000:.2f}ms)")
+    reads = get_histogram('db_statement_seconds', kind='read')
+    writes = get_histogram('db_statement_seconds', kind='write')
+    depth = GAUGES.get(key('db_write_queue_depth', {}), 0)
+    peak = GAUGES.get(key('db_write_queue_depth_max', {}), 0)
+    lines.append(f"* **Database**: {reads.count} reads ({reads.sum * 1000 / max(reads.count, 1):.2f}ms mean), "
+                 f"{writes.count} writes ({writes.sum * 1000 / max(writes.count, 1):.2f}ms mean), "
+                 f"{depth} queued writes (max {peak})")
+    sends = get_histogram('notification_send_seconds')
+    queued = COUNTERS.get(key('notices_queued', {}), 0)
+    sent = COUNTERS.get(key('notices_sent', {}), 0)
+    failed = COUNTERS.get(key('notices_failed', {}), 0)
+    lines.append(f"* **Notifications**: {queued} notices queued, {sent} sent in {sends.count} messages "
+                 f"(p99 ≤{sends.quantile(0.99)}s), {failed} failed")
+    requests = COUNTERS.get(key('websub_requests', {}), 0)
+    if (requests > 0):
+        verified = COUNTERS.get(key('websub_verified', {}), 0)
+        notifications = COUNTERS.get(key('websub_notifications', {}), 0)
+        rejected = COUNTERS.get(key('websub_rejected', {}), 0)
+        lines.append(f"* **WebSub**: {requests} hub requests, {verified} verified, "
+                     f"{notifications} notifications, {rejected} rejected")
+    slowest = sorted(SLOWEST.items(), key=lambda item: -item[1])[:5]
+    if (len(slowest) > 0):
+        lines.append("* **Slowest channels**: " + ", ".join(f"{name} ({seconds:.2f}s)" for (_, name), seconds in slowest))
+    return "\n".join(lines)
+
+async def handle_metrics(request) -> web.Response:
+    return web.Response(text=render(), content_type='text/plain')
+
+async def start(port=None) -> None:
+    """
+    Serves the metrics on a local port, METRICS_PORT by default, unless disabled or already running.
+    A port that can't be bound only disables the endpoint.
+    """
+    global RUNNER
+    port = config.METRICS_PORT if port is None else port
+    if (RUNNER is not None or port == 0):
+        return
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    RUNNER = web.AppRunner(app)
+    await RUNNER.setup()
+    try:
+        await web.TCPSite(RUNNER, config.METRICS_HOST, port).start()
+    except OSError as e:
+        print(f"Couldn't serve metrics on port {port}: {e}")
+        await RUNNER.cleanup()
+        RUNNER = None
+        return
+    print(f"Serving metrics on http://{config.METRICS_HOST}:{port}/metrics")
@@ -0,0 +1,220 @@
+# monitor.py
+# Detection side of the bot: schedules channel checks, fetches their status and records transitions.
+# It has no dependency on Discord, so it runs both inside the bot and in standalone poller workers.
+# Python libraries
+import time
+import asyncio
+
+# Local modules
+import config
+import poller
+import metrics
+import websub
+import history
+import twitch_helix
+import transitions
+import database
+import channel_store
+import response_cache
+import async_database
+from scheduler import Scheduler
+from scanner import YouTubeScanner, TwitchScanner
+
+SCHEDULER = Scheduler()
+ON_CHANGE = None # Coroutine function called with (row, 'live', 'resumed', 'offline' or 'title', title, url) on every confirmed change
+SAVED_STATE = {} # Channel id -> (lastcheck, misses) saved before the last restart
+LAST_SAVE = 0.0  # time.monotonic() of the last save of the polling state
+RUNNING = set()  # Tasks of the batches of checks in progress
+
+async def register_channel_status(platform, name, title, url, is_live) -> None:
+    """
+    Handles the actions to be realized when a stream is found to go online/offline.
+    Changes are confirmed by further checks before being applied (see transitions.py). State changes are kept
+    in the channel store until the polling cycle flushes them, and confirmed transitions are handed to the ON_CHANGE hook.
+    """
+    row = channel_store.get_by_name(platform, name)
+    if (row is None):
+        return # Removed while being checked
+    ch_id, ch_name, platform, status, ch_title, external_id = row
+    entry = SCHEDULER.entries.get((platform, name))
+    verdict = transitions.observe((platform, name), bool(status), is_live, entry.last_check if entry is not None else None)
+    if (verdict is None and is_live and title != ch_title):
+        verdict = 'title' # Still live under a new title
+    if (verdict in ('live', 'resumed', 'title')):
+        channel_store.update(ch_id, 'islive', True)
+        channel_store.update(ch_id, 'livetitle', title)
+    elif (verdict == 'offline'):
+        channel_store.update(ch_id, 'islive', False)
+        channel_store.update(ch_id, 'livetitle', None)
+    elif (verdict == 'pending'):
+        metrics.inc('transitions_pending', platform=platform)
+    history.record(ch_id, (platform, name), verdict, title)
+    if (verdict in ('live', 'resumed', 'offline', 'title')):
+        metrics.inc('transitions', platform=platform, kind=verdict)
+        if (ON_CHANGE is not None):
+            await ON_CHANGE(row, verdict, title if is_live else None, url)
+
+def next_delay(key) -> float:
+    """Delay of a channel's next check when a transition awaits confirmation, None to follow its regular interval."""
+    return config.CONFIRM_DELAY if transitions.pending(key) else None
+
+def skip_unchanged(platform, name, *values) -> bool:
+    """
+    Whether a check found the same values as the previous one, the channel's confirmed status being the same too
+    and no transition awaiting confirmation, in which case there is nothing to register.
+    """
+    row = channel_store.get_by_name(platform, name)
+    if (row is None):
+        return False
+    key = (platform, name)
+    return response_cache.unchanged(key, row[3], *values) and not transitions.pending(key)
+
+async def is_live_YT(name) -> bool:
+    """Checks if a YouTube channel is live."""
+    url = f'{config.YOUTUBE_URL}/@{name}/live'
+    scanner = await poller.scan(url, YouTubeScanner())
+    title, is_live = scanner.result()
+    if (skip_unchanged("YouTube", name, title, is_live, scanner.channel_id())):
+        return is_live
+    row = channel_store.get_by_name("YouTube", name)
+    channel_id = scanner.channel_id()
+    if (row is not None and channel_id is not None and row[5] != channel_id):
+        channel_store.update(row[0], 'externalid', channel_id) # Needed to subscribe to the channel's feed
+        await websub.subscribe(channel_id)
+    await register_channel_status("YouTube", name, title, url, is_live)
+    return is_live
+
+async def is_live_TW(name) -> bool:
+    """Checks if a Twitch channel is live."""
+    url = f'{config.TWITCH_URL}/{name}'
+    scanner = await poller.scan(url, TwitchScanner())
+    title, is_live = scanner.result()
+    if (not skip_unchanged("Twitch", name, title, is_live)):
+        await register_channel_status("Twitch", name, title, url, is_live)
+    return is_live
+
+CHECKS = {"YouTube": is_live_YT, "Twitch": is_live_TW}
+
+async def check_channel(key) -> None:
+    """
+    Checks a channel due in the scheduler and queues its next check.
+    A failed check only affects its own channel, which keeps its last known state.
+    """
+    platform, name = key
+    if (platform not in CHECKS):
+        SCHEDULER.remove(key) # Unsupported platform, never checked
+        return
+    is_live = None
+    start = time.perf_counter()
+    try:
+        is_live = await CHECKS[platform](name)
+    except poller.CircuitOpen:
+        metrics.inc('checks_skipped', platform=platform) # The last known state is kept
+    except Exception as e:
+        metrics.inc('check_failures', platform=platform)
+        print(f"Check of {platform} channel {name} failed: {e!r}")
+    finally:
+        metrics.observe_check(platform, name, time.perf_counter() - start)
+        if (platform == "YouTube"):
+            row = channel_store.get_by_name(platform, name)
+            SCHEDULER.set_pushed(key, row is not None and websub.is_subscribed(row[5]))
+        SCHEDULER.reschedule(key, is_live, next_delay(key))
+
+async def on_feed_entry(channel_id) -> None:
+    """Checks a YouTube channel right away when its feed announces a new video or stream."""
+    row = channel_store.find('externalid', channel_id)
+    if (row is not None):
+        SCHEDULER.expedite(("YouTube", row[1]))
+
+async def check_twitch_batch(keys) -> None:
+    """
+    Checks up to 100 Twitch channels with a single Helix request.
+    Falls back to scraping each channel page when the API can't be used, whatever the error,
+    so every channel of the batch is always rescheduled.
+    """
+    start = time.perf_counter()
+    try:
+        live = await twitch_helix.get_live_streams([name for _, name in keys])
+    except Exception as e:
+        print(f"Helix unavailable, scraping Twitch pages instead: {e!r}")
+        await asyncio.gather(*[check_channel(key) for key in keys], return_exceptions=True)
+        return
+    elapsed = time.perf_counter() - start
+    for key in keys:
+        name = key[1]
+        is_live = name.lower() in live
+        title = live.get(name.lower(), "")
+        try:
+            if (not skip_unchanged("Twitch", name, title, is_live)):
+                await register_channel_status("Twitch", name, title, f'{config.TWITCH_URL}/{name}', is_live)
+        except Exception as e:
+            metrics.inc('check_failures', platform="Twitch")
+            print(f"Check of Twitch channel {name} failed: {e!r}")
+        finally:
+            metrics.observe_check("Twitch", name, elapsed)
+            SCHEDULER.reschedule(key, is_live, next_delay(key))
+
+def get_checks(keys) -> list:
+    """Builds the checks of due channels, batching Twitch ones through Helix when it is configured."""
+    if (not twitch_helix.enabled()):
+        return [check_channel(key) for key in keys]
+    twitch = [key for key in keys if key[0] == "Twitch"]
+    checks = [check_channel(key) for key in keys if key[0] != "Twitch"]
+    for index in range(0, len(twitch), twitch_helix.BATCH_SIZE):
+        checks.append(check_twitch_batch(twitch[index:index + twitch_helix.BATCH_SIZE]))
+    return checks
+
+async def load_state() -> None:
+    """Reads the polling state saved before the last restart."""
+    SAVED_STATE.clear()
+    for channel_id, lastcheck, misses in await async_database.read(database.get_poll_state):
+        SAVED_STATE[channel_id] = (lastcheck, misses)
+
+def schedule(row) -> None:
+    """Starts checking a channel, resuming from its saved polling state if there is one."""
+    lastcheck, misses = SAVED_STATE.get(row[0], (None, 0))
+    SCHEDULER.add((row[2], row[1]), last_check=lastcheck, misses=misses, is_live=bool(row[3]),
+                  live_starts=history.STARTS.get(row[0], ()))
+
+async def save_state() -> None:
+    """Saves when each channel was last checked, so a restart doesn't check them all again."""
+    global LAST_SAVE
+    LAST_SAVE = time.monotonic()
+    states = []
+    for key, last_check, misses in SCHEDULER.snapshot():
+        row = channel_store.get_by_name(*key)
+        if (row is not None):
+            states.append((row[0], last_check, misses))
+            SAVED_STATE[row[0]] = (last_check, misses)
+    if (len(states) > 0):
+        await async_database.write(database.save_poll_state, states)
+
+async def run_batch(due) -> None:
+    """Checks a batch of due channels, each check rescheduling its channel as soon as it finishes."""
+    duration = await poller.run_cycle(get_checks(due))
+    metrics.observe('poll_cycle_seconds', duration)
+    print(f"Checked {len(due)} of {len(SCHEDULER)} channel(s) in {duration:.2f}s.")
+
+async def run_due() -> int:
+    """
+    Starts checking every channel due in the scheduler, without waiting for the checks, and flushes
+    the changes of those that finished. A slow check never delays the others. Returns how many were started.
+    """
+    due = SCHEDULER.pop_due()
+    if (len(due) > 0):
+        task = asyncio.create_task(run_batch(due))
+        RUNNING.add(task)
+        task.add_done_callback(RUNNING.discard)
+        metrics.inc('checks', len(due))
+    await channel_store.flush()
+    transitions.prune()
+    if (time.monotonic() - LAST_SAVE >= config.STATE_SAVE_INTERVAL):
+        await save_state()
+    await history.maintain()
+    metrics.set_gauge('poll_interval_seconds', config.SCHEDULER_TICK)
+    return len(due)
+
+async def wait_checks() -> None:
+    """Waits for the checks in progress, before stopping."""
+    if (len(RUNNING) > 0):
+        await asyncio.gather(*RUNNING, return_exceptions=True)
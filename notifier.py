@@ -0,0 +1,139 @@
+# notifier.py
+# Queues go-live notices and sends them to Discord in the background, so detection never waits on Discord.
+# Python libraries
+import time
+import asyncio
+
+# Local modules
+import config
+import metrics
+
+# External libraries
+import discord
+
+MESSAGE_LIMIT = 2000 # Characters allowed in a Discord message
+SEPARATOR = "\n"
+
+CHANNELS = {}   # Discord channel id -> resolved channel object
+PENDING = {}    # Discord channel id -> list of queued notices
+BUCKETS = {}    # Discord channel id -> TokenBucket
+SENDING = set() # Discord channel ids with a message being sent, so a channel's messages arrive in order
+WAKE = asyncio.Event()
+TASK = None
+
+class TokenBucket:
+    """Rate limiter allowing a burst of actions, refilled at a steady rate."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available."""
+        self.refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.refill()
+        self.tokens -= 1
+
+GLOBAL_BUCKET = TokenBucket(config.NOTIFY_GLOBAL_RATE, config.NOTIFY_GLOBAL_RATE)
+
+async def resolve_channel(bot, channel_id) -> discord.abc.Messageable:
+    """Gets a Discord channel from the cache, then the client's state, and only then through the API."""
+    channel = CHANNELS.get(channel_id)
+    if (channel is None):
+        channel = bot.get_channel(channel_id)
+        if (channel is None):
+            channel = await bot.fetch_channel(channel_id)
+            metrics.inc('discord_channels_fetched')
+        CHANNELS[channel_id] = channel
+    return channel
+
+def channel_bucket(channel_id) -> TokenBucket:
+    """Gets the rate limiter of a Discord channel."""
+    bucket = BUCKETS.get(channel_id)
+    if (bucket is None):
+        bucket = BUCKETS[channel_id] = TokenBucket(config.NOTIFY_CHANNEL_RATE, config.NOTIFY_CHANNEL_BURST)
+    return bucket
+
+def enqueue(channel_id, message) -> None:
+    """Queues a notice for a Discord channel. Returns immediately."""
+    PENDING.setdefault(channel_id, []).append(message)
+    metrics.inc('notices_queued')
+    WAKE.set()
+
+def take_batch(channel_id) -> (str, int):
+    """Joins as many queued notices of a channel as fit in one message. Returns the message and its notice count."""
+    notices = PENDING[channel_id]
+    message = notices[0]
+    count = 1
+    while (count < len(notices) and len(message) + len(SEPARATOR) + len(notices[count]) <= MESSAGE_LIMIT):
+        message += SEPARATOR + notices[count]
+        count += 1
+    del notices[:count]
+    if (len(notices) < 1):
+        del PENDING[channel_id]
+    return message, count
+
+async def send(bot, channel_id, message, count) -> None:
+    """Sends a message, forgetting the cached channel if Discord refuses it."""
+    start = time.perf_counter()
+    try:
+        channel = await resolve_channel(bot, channel_id)
+        await channel.send(message, allowed_mentions=discord.AllowedMentions(roles=True))
+        metrics.observe('notification_send_seconds', time.perf_counter() - start)
+        metrics.inc('notices_sent', count)
+    except (discord.NotFound, discord.Forbidden) as e:
+        CHANNELS.pop(channel_id, None)
+        metrics.inc('notices_failed', count)
+        print(f"Couldn't notify channel {channel_id}: {e}")
+    except discord.HTTPException as e:
+        metrics.inc('notices_failed', count)
+        print(f"Couldn't notify channel {channel_id}: {e}")
+    finally:
+        SENDING.discard(channel_id)
+
+async def drain(bot) -> None:
+    """
+    Sends queued notices while respecting the per-channel and global rate limits.
+    Channels are sent to concurrently, but each one only has a single message in flight.
+    """
+    sending = set()
+    while (True):
+        await WAKE.wait()
+        WAKE.clear()
+        await asyncio.sleep(config.NOTIFY_BATCH_DELAY) # Let notices of the same polling batch gather
+        while (len(PENDING) > 0):
+            for channel_id in list(PENDING):
+                if (GLOBAL_BUCKET.delay() > 0):
+                    break
+                bucket = channel_bucket(channel_id)
+                if (channel_id in SENDING or bucket.delay() > 0):
+                    continue
+                bucket.take()
+                GLOBAL_BUCKET.take()
+                SENDING.add(channel_id)
+                message, count = take_batch(channel_id)
+                task = asyncio.create_task(send(bot, channel_id, message, count))
+                sending.add(task)
+                task.add_done_callback(sending.discard)
+            if (len(PENDING) > 0):
+                wait = min(channel_bucket(channel_id).delay() for channel_id in PENDING)
+                await asyncio.sleep(max(wait, GLOBAL_BUCKET.delay(), 0.05))
+
+def start(bot) -> None:
+    """Starts the background dispatcher, unless it is already running."""
+    global TASK
+    if (TASK is None or TASK.done()):
+        TASK = asyncio.create_task(drain(bot))
+
+def queue_size() -> int:
+    return sum(len(notices) for notices in PENDING.values())
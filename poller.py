@@ -0,0 +1,195 @@
+# poller.py
+# Python libraries
+import time
+import random
+import asyncio
+
+# Local modules
+import config
+import metrics
+import response_cache
+import scanner as page_scanner
+
+# External libraries
+import aiohttp
+
+SESSION = None
+SEMAPHORE = None
+BREAKERS = {}   # Platform -> CircuitBreaker
+
+class FetchError(Exception):
+    """
+    Raised when a page can't be fetched.
+    Retryable errors (timeouts, lost connections, 429 and 5xx answers) point at the platform, others at the channel.
+    """
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+class CircuitOpen(Exception):
+    """Raised instead of fetching while a platform's circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Stops requests to a platform after several consecutive failures.
+    Once the cooldown has passed a single trial request is let through, closing the circuit if it succeeds.
+    """
+
+    def __init__(self, platform, threshold=config.BREAKER_THRESHOLD, cooldown=config.BREAKER_COOLDOWN):
+        self.platform = platform
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    def state(self) -> str:
+        if (self.opened_at is None):
+            return 'closed'
+        return 'open' if time.monotonic() - self.opened_at < self.cooldown else 'half-open'
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        state = self.state()
+        if (state == 'closed'):
+            return True
+        if (state == 'half-open' and not self.trial):
+            self.trial = True
+            return True
+        return False
+
+    def success(self) -> None:
+        if (self.opened_at is not None):
+            print(f"{self.platform} is reachable again, closing its circuit.")
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        metrics.set_gauge('circuit_open', 0, platform=self.platform)
+
+    def failure(self) -> None:
+        self.failures += 1
+        if (self.trial or (self.opened_at is None and self.failures >= self.threshold)):
+            if (self.opened_at is None):
+                print(f"{self.platform} failed {self.failures} times in a row, pausing its checks for {self.cooldown:.0f}s.")
+                metrics.inc('circuit_opened', platform=self.platform)
+            self.opened_at = time.monotonic()
+            self.trial = False
+            metrics.set_gauge('circuit_open', 1, platform=self.platform)
+
+def get_breaker(platform) -> CircuitBreaker:
+    """Returns the circuit breaker of a platform, creating it on first use."""
+    if (platform not in BREAKERS):
+        BREAKERS[platform] = CircuitBreaker(platform)
+    return BREAKERS[platform]
+
+def backoff(attempt) -> float:
+    """Seconds to wait before a retry: a random delay up to an exponentially growing cap (full jitter)."""
+    return random.uniform(0, min(config.RETRY_BASE_DELAY * 2 ** attempt, config.RETRY_MAX_DELAY))
+
+async def get_session() -> aiohttp.ClientSession:
+    """Returns the shared HTTP session, creating it on first use."""
+    global SESSION, SEMAPHORE
+    if (SESSION is None or SESSION.closed):
+        connector = aiohttp.TCPConnector(
+            limit=config.POLL_CONCURRENCY,
+            limit_per_host=config.POLL_CONCURRENCY_PER_HOST)
+        timeout = aiohttp.ClientTimeout(
+            total=config.POLL_TIMEOUT,
+            connect=config.POLL_CONNECT_TIMEOUT,
+            sock_read=config.POLL_READ_TIMEOUT)
+        SESSION = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        SEMAPHORE = asyncio.Semaphore(config.POLL_CONCURRENCY)
+    return SESSION
+
+async def close_session() -> None:
+    """Closes the shared HTTP session and its pooled connections."""
+    global SESSION
+    if (SESSION is not None and not SESSION.closed):
+        await SESSION.close()
+    SESSION = None
+
+async def scan_once(url, scanner) -> None:
+    """
+    Streams the body of a page into a scanner.
+    The connection is closed as soon as the scanner has found everything it needs.
+    """
+    session = await get_session()
+    parse_time = 0.0
+    headers = {} # aiohttp already asks for compressed pages, Brotli too when its package is installed
+    cached = response_cache.get_validators(url)
+    if (cached is not None):
+        etag, last_modified, found = cached
+        if (etag is not None):
+            headers['If-None-Match'] = etag
+        if (last_modified is not None):
+            headers['If-Modified-Since'] = last_modified
+        metrics.inc('conditional_requests', platform=scanner.platform)
+    async with SEMAPHORE:
+        start = time.perf_counter()
+        async with session.get(url, headers=headers) as response:
+            if (response.status == 304 and cached is not None):
+                scanner.found = dict(found) # Same page as last time
+                metrics.inc('not_modified', platform=scanner.platform)
+            elif (response.status >= 400):
+                raise FetchError(f"{url} answered {response.status}", response.status == 429 or response.status >= 500)
+            else:
+                async for chunk in response.content.iter_chunked(page_scanner.CHUNK_SIZE):
+                    parse_start = time.perf_counter()
+                    scanner.feed(chunk)
+                    done = scanner.done()
+                    parse_time += time.perf_counter() - parse_start
+                    if (done):
+                        response.close()
+                        break
+                response_cache.store_validators(
+                    url, response.headers.get('ETag'), response.headers.get('Last-Modified'), scanner.found)
+        metrics.observe('fetch_seconds', time.perf_counter() - start, platform=scanner.platform)
+    metrics.observe('parse_seconds', parse_time, platform=scanner.platform)
+    metrics.inc('downloaded_bytes', scanner.bytes_read, platform=scanner.platform)
+
+async def scan(url, scanner) -> page_scanner.PageScanner:
+    """
+    Scans a page, retrying platform failures with jittered exponential backoff.
+    Raises CircuitOpen without fetching while the platform's circuit breaker is open,
+    and FetchError once the retries are exhausted or for errors specific to the channel.
+    """
+    breaker = get_breaker(scanner.platform)
+    if (not breaker.allow()):
+        raise CircuitOpen(f"{scanner.platform} checks are paused")
+    attempt = 0
+    try:
+        while (True):
+            try:
+                await scan_once(url, scanner)
+                breaker.success()
+                return scanner
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = FetchError(f"{url}: {e!r}")
+            except FetchError as e:
+                error = e
+            if (not error.retryable):
+                breaker.success() # The platform answered, the channel itself is at fault
+                raise error
+            if (attempt >= config.POLL_RETRIES or breaker.state() == 'open'):
+                metrics.inc('fetch_failures', platform=scanner.platform)
+                breaker.failure()
+                raise error
+            metrics.inc('fetch_retries', platform=scanner.platform)
+            scanner.reset()
+            await asyncio.sleep(backoff(attempt))
+            attempt += 1
+    finally:
+        scanner.finish()
+
+async def run_cycle(checks) -> float:
+    """
+    Runs every channel check of a polling cycle concurrently.
+    Returns the wall-clock duration of the cycle in seconds.
+    """
+    start = time.perf_counter()
+    results = await asyncio.gather(*checks, return_exceptions=True)
+    for result in results:
+        if (isinstance(result, Exception)):
+            print(f"Check failed: {result!r}")
+    return time.perf_counter() - start
@@ -0,0 +1,60 @@
+# response_cache.py
+# Memory of previous checks, to avoid repeating work when a channel page hasn't changed.
+# Validators let the platform answer '304 Not Modified' instead of sending the page again,
+# and fingerprints of the extracted values let unchanged results skip their registration.
+# Python libraries
+from collections import OrderedDict
+
+# Local modules
+import config
+import metrics
+
+class LRUCache:
+    """Dictionary holding at most maxsize entries, evicting the least recently used one."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if (value is not None):
+            self.entries.move_to_end(key)
+        return value
+
+    def set(self, key, value) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if (len(self.entries) > self.maxsize):
+            self.entries.popitem(last=False)
+
+    def pop(self, key) -> None:
+        self.entries.pop(key, None)
+
+VALIDATORS = LRUCache(config.RESPONSE_CACHE_SIZE)   # url -> (ETag, Last-Modified, values found in the page)
+FINGERPRINTS = LRUCache(config.RESPONSE_CACHE_SIZE) # (platform, name) -> fingerprint of the last check's result
+
+def get_validators(url) -> tuple:
+    """Returns the (ETag, Last-Modified, found values) of a page's last full response, or None."""
+    return VALIDATORS.get(url)
+
+def store_validators(url, etag, last_modified, found) -> None:
+    """Remembers the validators of a page along with the values found in it, if the platform sent any."""
+    if (etag is None and last_modified is None):
+        VALIDATORS.pop(url)
+        return
+    VALIDATORS.set(url, (etag, last_modified, dict(found)))
+
+def unchanged(key, *values) -> bool:
+    """Records the fingerprint of a channel's check result, returning whether it is the same as the last one."""
+    fingerprint = hash(values)
+    same = FINGERPRINTS.get(key) == fingerprint
+    FINGERPRINTS.set(key, fingerprint)
+    metrics.inc('results_unchanged' if same else 'results_changed', platform=key[0])
+    return same
+
+def forget(key) -> None:
+    FINGERPRINTS.pop(key)
@@ -0,0 +1,124 @@
+# scanner.py
+# Markers searched in the channel pages. A marker with an end delimiter captures the text in between,
+# while a marker without one only records its presence.
+YT_MARKERS = {
+    'title': (b'<title>', b'</title>'),
+    'canonical': (b'<link rel="canonical" href="https://www.youtube.com/', b'>'),
+    'status': (b'"status":"', b'"')}
+TW_MARKERS = {
+    'title': (b'<title>', b'</title>'),
+    'live': (b'"isLiveBroadcast":true', None),
+    'description': (b'"VideoObject","description":"', b'"'),
+    'head_end': (b'</head>', None)}
+
+CHUNK_SIZE = 16384
+
+class ParseError(Exception):
+    """
+    Raised when a page lacks the markers needed to tell whether its channel is live, like a consent
+    interstitial, a truncated body or a changed layout, so the channel keeps its last known status.
+    """
+
+class PageScanner:
+    """Incrementally searches page chunks for markers, keeping only the unscanned tail in memory."""
+
+    def __init__(self, markers):
+        self.markers = markers
+        self.found = {}
+        self.buffer = bytearray()
+        self.bytes_read = 0
+        self.tail = max(len(start) for start, end in markers.values())
+
+    def feed(self, chunk) -> None:
+        """Scans a new chunk of the page body."""
+        self.bytes_read += len(chunk)
+        self.buffer += chunk
+        keep_from = max(len(self.buffer) - self.tail + 1, 0)
+        for field, (start, end) in self.markers.items():
+            if (field in self.found):
+                continue
+            position = self.buffer.find(start)
+            if (position < 0):
+                continue
+            if (end is None):
+                self.found[field] = True
+                continue
+            value_start = position + len(start)
+            value_end = self.buffer.find(end, value_start)
+            if (value_end < 0):
+                keep_from = min(keep_from, position) # Value continues in the next chunk
+            else:
+                self.found[field] = bytes(self.buffer[value_start:value_end]).decode('utf8', errors='replace')
+        del self.buffer[:keep_from]
+
+    def reset(self) -> None:
+        """Forgets what was found, before scanning the page again."""
+        self.found = {}
+        self.buffer = bytearray()
+
+    def finish(self) -> None:
+        """Releases the buffer once the page has been fully read or abandoned."""
+        self.buffer = bytearray()
+
+class YouTubeScanner(PageScanner):
+    """Extracts the title and live status of a YouTube '/live' page."""
+
+    platform = 'YouTube'
+
+    def __init__(self):
+        super().__init__(YT_MARKERS)
+
+    def is_livestream(self) -> bool:
+        """A live page redirects its canonical link to a '/watch?v=' url."""
+        return self.found.get('canonical', '').split('?')[0] == 'watch'
+
+    def channel_id(self) -> str:
+        """Id of the channel, given by the canonical link of pages that aren't live."""
+        canonical = self.found.get('canonical', '').rstrip('"')
+        return canonical[len('channel/'):] if canonical.startswith('channel/') else None
+
+    def exists(self) -> bool:
+        """Unknown handles answer '404 Not Found', so any page that was read belongs to a channel."""
+        return 'title' in self.found
+
+    def done(self) -> bool:
+        if ('title' not in self.found or 'canonical' not in self.found):
+            return False
+        return not self.is_livestream() or 'status' in self.found
+
+    def result(self) -> (str, bool):
+        """Returns (title, is_live). Raises ParseError when the page can't tell."""
+        if ('title' not in self.found or 'canonical' not in self.found):
+            raise ParseError(f"YouTube page without {'a title' if 'title' not in self.found else 'a canonical link'}")
+        if (self.is_livestream() and 'status' not in self.found):
+            raise ParseError("YouTube stream page without a playability status")
+        is_live = self.is_livestream() and self.found['status'] == 'OK'
+        return self.found['title'], is_live
+
+class TwitchScanner(PageScanner):
+    """Extracts the title and live status of a Twitch channel page."""
+
+    platform = 'Twitch'
+
+    def __init__(self):
+        super().__init__(TW_MARKERS)
+
+    def exists(self) -> bool:
+        """Pages of unknown channels are titled 'Twitch' alone, instead of '[channel] - Twitch'."""
+        return self.found.get('title', 'Twitch').strip() != 'Twitch'
+
+    def done(self) -> bool:
+        """
+        Live pages describe their stream in the head, so a page whose head ended without it is offline,
+        and the rest of the page, most of its weight, is never downloaded.
+        """
+        if ('title' not in self.found):
+            return False
+        return ('live' in self.found and 'description' in self.found) or 'head_end' in self.found
+
+    def result(self) -> (str, bool):
+        """Returns (title, is_live). Raises ParseError when the page can't tell."""
+        if ('title' not in self.found):
+            raise ParseError("Twitch page without a title")
+        is_live = self.found.get('live', False)
+        return (self.found.get('description', '') if is_live else ''), is_live
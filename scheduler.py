@@ -0,0 +1,155 @@
+# scheduler.py
+# Python libraries
+import time
+import heapq
+import random
+import itertools
+from collections import deque
+
+# Local module
+import config
+
+DAY = 86400
+JITTER = 0.1    # Fraction of the interval randomized to avoid checks clumping together
+MAX_STARTS = 20 # Go-live times remembered per channel
+
+class ChannelSchedule:
+    """Polling state of a single channel."""
+
+    def __init__(self):
+        self.next_check = 0.0
+        self.is_live = False
+        self.misses = 0                              # Consecutive offline checks
+        self.live_starts = deque(maxlen=MAX_STARTS)  # Seconds since midnight (UTC) of past go-live transitions
+        self.in_flight = False
+        self.pushed = False                          # Whether push notifications cover the channel
+        self.last_check = None                       # time.time() at which the last check finished
+
+class Scheduler:
+    """
+    Priority queue of channel checks, each channel holding its own next-check time.
+    Channels are keyed by (platform, name).
+    """
+
+    def __init__(self, rate=config.POLL_RATE, base_interval=config.BASE_INTERVAL,
+                 min_interval=config.MIN_INTERVAL, max_interval=config.MAX_INTERVAL):
+        self.rate = rate
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+        self.tokens = 0.0
+        self.last_refill = time.monotonic()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, key, due) -> None:
+        entry = self.entries[key]
+        entry.next_check = due
+        heapq.heappush(self.heap, (due, next(self.counter), key))
+
+    def add(self, key, delay=None, last_check=None, misses=0, is_live=False, live_starts=()) -> None:
+        """
+        Starts tracking a channel.
+        Without an explicit delay the first check is placed at random within the base interval,
+        spreading checks evenly instead of firing them all at once.
+        A channel checked before a restart (last_check) is next checked when its interval ends,
+        those already overdue being spread over WARMUP_SPREAD seconds.
+        live_starts seeds the go-live times (seconds since midnight, UTC) around which checks are more frequent.
+        """
+        if (key in self.entries):
+            return
+        entry = self.entries[key] = ChannelSchedule()
+        entry.is_live = is_live
+        entry.live_starts.extend(live_starts)
+        if (delay is None and last_check is not None):
+            entry.last_check = last_check
+            entry.misses = misses
+            wall_time = time.time()
+            delay = last_check + self.interval(entry, wall_time) - wall_time
+            if (delay <= 0):
+                delay = random.uniform(0, config.WARMUP_SPREAD)
+        elif (delay is None):
+            delay = random.uniform(0, self.base_interval)
+        self.push(key, time.monotonic() + delay)
+
+    def remove(self, key) -> None:
+        """Stops tracking a channel. Its queued check is discarded lazily."""
+        self.entries.pop(key, None)
+
+    def pop_due(self, now=None) -> list:
+        """Returns the channels whose check is due, within the global requests-per-second budget."""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.tokens + (now - self.last_refill) * self.rate, max(self.rate * config.SCHEDULER_TICK, 1))
+        self.last_refill = now
+        due = []
+        while (len(self.heap) > 0 and self.heap[0][0] <= now and self.tokens >= 1):
+            next_check, _, key = heapq.heappop(self.heap)
+            entry = self.entries.get(key)
+            if (entry is None or entry.next_check != next_check or entry.in_flight):
+                continue # Removed or rescheduled since it was queued
+            entry.in_flight = True
+            self.tokens -= 1
+            due.append(key)
+        return due
+
+    def near_usual_start(self, entry, wall_time) -> bool:
+        """Whether the time of day is close to one at which the channel went live before."""
+        time_of_day = wall_time % DAY
+        for start in entry.live_starts:
+            distance = abs((time_of_day - start + DAY / 2) % DAY - DAY / 2)
+            if (distance <= config.HOT_WINDOW):
+                return True
+        return False
+
+    def interval(self, entry, wall_time) -> float:
+        """Seconds until the next check of a channel."""
+        if (entry.is_live):
+            return self.base_interval
+        if (self.near_usual_start(entry, wall_time)):
+            return self.min_interval
+        if (entry.pushed):
+            return self.max_interval # Polling is only a safety net
+        backoff = 2 ** (entry.misses // config.BACKOFF_CHECKS)
+        return min(self.base_interval * backoff, self.max_interval)
+
+    def expedite(self, key, delay=0.0) -> None:
+        """Moves the next check of a channel forward, unless it is already being checked or due sooner."""
+        entry = self.entries.get(key)
+        if (entry is None or entry.in_flight):
+            return
+        due = time.monotonic() + delay
+        if (due < entry.next_check):
+            self.push(key, due)
+
+    def snapshot(self) -> [(tuple, float, int)]:
+        """Returns the (key, last_check, misses) state of every channel checked at least once."""
+        return [(key, entry.last_check, entry.misses) for key, entry in self.entries.items() if entry.last_check is not None]
+
+    def set_pushed(self, key, pushed) -> None:
+        entry = self.entries.get(key)
+        if (entry is not None):
+            entry.pushed = pushed
+
+    def reschedule(self, key, is_live, delay=None) -> None:
+        """
+        Queues the next check of a channel after one finished.
+        is_live is None when the check failed, in which case the previous state is kept.
+        An explicit delay replaces the channel's interval, e.g. to confirm a transition quickly.
+        """
+        entry = self.entries.get(key)
+        if (entry is None):
+            return
+        wall_time = time.time()
+        entry.in_flight = False
+        entry.last_check = wall_time
+        if (is_live is not None):
+            if (is_live and not entry.is_live):
+                entry.live_starts.append(wall_time % DAY)
+            entry.misses = 0 if is_live else entry.misses + 1
+            entry.is_live = is_live
+        interval = self.interval(entry, wall_time) if delay is None else delay
+        self.push(key, time.monotonic() + interval * random.uniform(1 - JITTER, 1 + JITTER))
@@ -0,0 +1,63 @@
+# sharding.py
+# Splits the channels between poller workers sharing the same database.
+# Channels are hashed into a fixed number of shards, each shard is assigned to a live worker by rendezvous hashing,
+# and a worker only checks the channels of the shards it holds an unexpired lease on.
+# Python libraries
+import time
+import zlib
+
+# Local modules
+import config
+import metrics
+import database
+import async_database
+
+OWNED = set()       # Shards leased to this worker
+LEASE_EXPIRES = 0.0 # time.time() at which the leases in OWNED expire unless renewed
+
+def shard_of(key) -> int:
+    """Shard of a (platform, name) channel key, the same in every process."""
+    platform, name = key
+    return zlib.crc32(f'{platform}:{name}'.encode('utf8')) % config.SHARDS
+
+def owner(shard, workers) -> str:
+    """
+    Worker a shard is assigned to: the one with the highest hash for it.
+    When a worker joins or leaves, only the shards it gains or loses change hands.
+    """
+    return max(workers, key=lambda worker: zlib.crc32(f'{worker}:{shard}'.encode('utf8')))
+
+def owns(key) -> bool:
+    """Whether this worker currently holds the lease of a channel's shard."""
+    return time.time() < LEASE_EXPIRES and shard_of(key) in OWNED
+
+async def rebalance(worker=config.WORKER_ID) -> set:
+    """
+    Sends the worker's heartbeat, then renews or takes the leases of the shards assigned to it
+    and releases those assigned elsewhere. Shards still leased to another worker are taken once
+    that worker releases them or its lease expires. Returns the shards leased to the worker.
+    """
+    global OWNED, LEASE_EXPIRES
+    now = time.time()
+    await async_database.write(database.heartbeat, worker, now)
+    workers = await async_database.read(database.get_workers, now - config.LEASE_TTL)
+    if (worker not in workers):
+        workers.append(worker)
+    wanted = {shard for shard in range(config.SHARDS) if owner(shard, workers) == worker}
+    released = OWNED - wanted
+    if (len(released) > 0):
+        await async_database.write(database.release_leases, worker, sorted(released))
+    acquired = await async_database.write(database.acquire_leases, worker, sorted(wanted), now + config.LEASE_TTL, now)
+    OWNED = set(acquired)
+    LEASE_EXPIRES = now + config.LEASE_TTL
+    metrics.set_gauge('shards_owned', len(OWNED))
+    metrics.set_gauge('workers_alive', len(workers))
+    return OWNED
+
+async def leave(worker=config.WORKER_ID) -> None:
+    """Releases every lease of a stopping worker, so the others take its shards without waiting for them to expire."""
+    global OWNED, LEASE_EXPIRES
+    await async_database.write(database.release_leases, worker, sorted(OWNED))
+    await async_database.write(database.remove_worker, worker)
+    OWNED = set()
+    LEASE_EXPIRES = 0.0
@@ -0,0 +1,67 @@
+# target_store.py
+# In-memory copy of the targets table: the Discord servers following each channel and how they are notified.
+# Reads are served from memory, while changes, which only come from commands, are written right away.
+# Local modules
+import database
+import async_database
+
+BY_ID = {}      # Target id -> row as a list of values ordered like database.TARGET_COLUMNS
+BY_CHANNEL = {} # Channel id -> set of target ids
+BY_GUILD = {}   # Guild id -> set of target ids
+
+async def load() -> None:
+    """Loads every target of the database into memory."""
+    rows = await async_database.read(database.get_targets)
+    BY_ID.clear()
+    BY_CHANNEL.clear()
+    BY_GUILD.clear()
+    for row in rows:
+        add(row)
+
+def add(row) -> None:
+    """Adds a target row read from the database."""
+    if (row is None):
+        return
+    BY_ID[row[0]] = list(row)
+    BY_CHANNEL.setdefault(row[1], set()).add(row[0])
+    BY_GUILD.setdefault(row[2], set()).add(row[0])
+
+def remove(target_id) -> None:
+    row = BY_ID.pop(target_id, None)
+    if (row is not None):
+        BY_CHANNEL.get(row[1], set()).discard(target_id)
+        BY_GUILD.get(row[2], set()).discard(target_id)
+
+def get(target_id) -> tuple:
+    row = BY_ID.get(target_id)
+    return tuple(row) if row is not None else None
+
+def find(channel_id, guild) -> tuple:
+    """Gets the target of a channel in a server."""
+    for target_id in BY_CHANNEL.get(channel_id, ()):
+        if (BY_ID[target_id][2] == guild):
+            return tuple(BY_ID[target_id])
+    return None
+
+def for_channel(channel_id) -> [tuple]:
+    """Gets the targets notified when a channel goes live."""
+    return [tuple(BY_ID[target_id]) for target_id in BY_CHANNEL.get(channel_id, ())]
+
+def for_guild(guild) -> [tuple]:
+    """Gets the targets of a server."""
+    return [tuple(BY_ID[target_id]) for target_id in BY_GUILD.get(guild, ())]
+
+async def update(target_id, column, value) -> None:
+    """Changes a value of a target, in memory and in the database."""
+    row = BY_ID.get(target_id)
+    if (row is None):
+        return
+    index = database.TARGET_COLUMNS.index(column)
+    if (column == 'guild'):
+        BY_GUILD.get(row[index], set()).discard(target_id)
+        BY_GUILD.setdefault(value, set()).add(target_id)
+    row[index] = value
+    await async_database.write(database.update_value, 'targets', column, value, 'id', target_id)
+
+def get_targets() -> [tuple]:
+    return [tuple(row) for row in BY_ID.values()]
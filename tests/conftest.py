@@ -0,0 +1,7 @@
+# conftest.py
+# Makes the bot's modules, kept at the root of the repository, importable from the tests.
+# Python libraries
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+# test_fanout.py
+# Splitting of subscriber mentions and batching of notices, for channels with 10k subscribers.
+# Python libraries
+import re
+import random
+
+# Local modules
+import fanout
+import notifier
+from notifier import MESSAGE_LIMIT
+
+SUBSCRIBERS = 10000
+HEADER = "## streamer's [stream is live](https://www.twitch.tv/streamer) !\nGo watch today's stream **title**\n"
+
+def get_mentions(count=SUBSCRIBERS) -> [str]:
+    """Mentions of Discord-sized user ids, of varying lengths like real ones."""
+    generator = random.Random(count)
+    return [f"<@{generator.randrange(10 ** 16, 10 ** 19)}>; " for _ in range(count)]
+
+def test_split_mentions_fit_the_limit():
+    messages = fanout.split_mentions(HEADER, get_mentions())
+    assert all(len(message) <= MESSAGE_LIMIT for message in messages)
+    assert messages[0].startswith(HEADER)
+    assert all(message.startswith("*") and message.endswith("*") for message in messages[1:])
+
+def test_split_mentions_keep_every_mention_once_in_order():
+    mentions = get_mentions()
+    messages = fanout.split_mentions(HEADER, mentions)
+    found = re.findall(r"<@\d+>; ", "".join(messages))
+    assert found == mentions
+
+def test_split_mentions_use_the_fewest_messages():
+    mentions = get_mentions()
+    messages = fanout.split_mentions(HEADER, mentions)
+    # Mentions are kept in order, so packing each message until the next mention doesn't fit is optimal:
+    # every message but the last one must be unable to take the first mention of the next message
+    position = 0
+    for message in messages[:-1]:
+        position += len(re.findall(r"<@\d+>; ", message))
+        assert len(message) + len(mentions[position]) > MESSAGE_LIMIT
+    total = len(HEADER) + len("*Subscribers:  ") + sum(len(mention) for mention in mentions)
+    assert len(messages) >= -(-total // MESSAGE_LIMIT)
+
+def test_split_mentions_without_subscribers():
+    assert fanout.split_mentions(HEADER, []) == [HEADER + "*Subscribers:  *"]
+
+def test_take_batch_never_joins_past_the_limit():
+    notifier.PENDING.clear()
+    notices = fanout.split_mentions(HEADER, get_mentions()) + [HEADER + "*@here get in here!*"] * 20
+    for notice in notices:
+        notifier.enqueue(1, notice)
+    batches = []
+    while (1 in notifier.PENDING):
+        batches.append(notifier.take_batch(1))
+    assert all(len(message) <= MESSAGE_LIMIT for message, _ in batches)
+    assert sum(count for _, count in batches) == len(notices)
+    # Batches are consecutive notices joined in order
+    assert notifier.SEPARATOR.join(message for message, _ in batches) == notifier.SEPARATOR.join(notices)
+
+def test_take_batch_joins_small_notices():
+    notifier.PENDING.clear()
+    for index in range(30):
+        notifier.enqueue(2, f"notice {index}")
+    message, count = notifier.take_batch(2)
+    assert count == 30
+    assert message == notifier.SEPARATOR.join(f"notice {index}" for index in range(30))
+    assert 2 not in notifier.PENDING
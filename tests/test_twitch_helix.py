@@ -0,0 +1,77 @@
+# test_twitch_helix.py
+# Twitch live status through the stand-in Helix API: batching, token reuse and renewal, and the scraping fallback.
+# Python libraries
+import asyncio
+
+# Local modules
+import config
+import poller
+import monitor
+import twitch_helix
+from benchmarks import mock_helix
+
+# External libraries
+import pytest
+
+LOGINS = [f"Streamer{index:03d}" for index in range(250)]
+
+async def run_with_helix(scenario, helix) -> None:
+    """Starts the stand-in Helix API, points the client at it, runs scenario(), then stops it."""
+    runner, helix_url = await mock_helix.start(helix)
+    config.TWITCH_API_URL, config.TWITCH_AUTH_URL = f"{helix_url}/helix", f"{helix_url}/oauth2/token"
+    try:
+        await scenario()
+    finally:
+        await poller.close_session()
+        await runner.cleanup()
+
+@pytest.fixture(autouse=True)
+def client(monkeypatch):
+    monkeypatch.setattr(config, "TWITCH_CLIENT_ID", mock_helix.CLIENT_ID)
+    monkeypatch.setattr(config, "TWITCH_CLIENT_SECRET", mock_helix.CLIENT_SECRET)
+    monkeypatch.setattr(config, "TWITCH_API_URL", config.TWITCH_API_URL) # Restored after run_with_helix points it at the stand-in
+    monkeypatch.setattr(config, "TWITCH_AUTH_URL", config.TWITCH_AUTH_URL)
+    monkeypatch.setattr(poller, "BREAKERS", {})
+    monkeypatch.setattr(twitch_helix, "TOKEN", None)
+    yield
+
+def test_logins_are_requested_in_batches_of_100():
+    helix = mock_helix.MockHelix(live_ratio=0.5)
+    async def scenario():
+        live = await twitch_helix.get_live_streams(LOGINS)
+        assert helix.stream_requests == 3 # The stand-in refuses requests of more than 100 logins
+        assert set(live) == {login.lower() for login in LOGINS if helix.is_live(login.lower())}
+    asyncio.run(run_with_helix(scenario, helix))
+
+def test_token_is_reused_across_calls():
+    helix = mock_helix.MockHelix()
+    async def scenario():
+        await twitch_helix.get_live_streams(LOGINS[:10])
+        await twitch_helix.get_live_streams(LOGINS[10:20])
+        assert helix.token_requests == 1
+        assert helix.stream_requests == 2
+    asyncio.run(run_with_helix(scenario, helix))
+
+def test_revoked_token_is_renewed_once():
+    helix = mock_helix.MockHelix(live_ratio=1.0)
+    async def scenario():
+        await twitch_helix.get_live_streams(LOGINS[:10])
+        helix.revoke_tokens()
+        live = await twitch_helix.get_live_streams(LOGINS[:10])
+        assert len(live) == 10
+        assert helix.token_requests == 2
+        assert helix.stream_requests == 3 # The refused request, then its retry with the new token
+    asyncio.run(run_with_helix(scenario, helix))
+
+def test_batch_falls_back_to_scraping_when_helix_fails(monkeypatch):
+    helix = mock_helix.MockHelix()
+    scraped = []
+    async def check_channel(key):
+        scraped.append(key)
+    monkeypatch.setattr(monitor, "check_channel", check_channel)
+    monkeypatch.setattr(config, "TWITCH_CLIENT_ID", "unknown-client-id") # Helix refuses every request of this client
+    keys = [("Twitch", login) for login in LOGINS[:100]]
+    async def scenario():
+        await monitor.check_twitch_batch(keys)
+        assert scraped == keys
+    asyncio.run(run_with_helix(scenario, helix))
@@ -0,0 +1,92 @@
+# test_websub.py
+# Round trips of the WebSub receiver against the stand-in hub: verification, signed notifications and unsubscription.
+# Python libraries
+import socket
+import asyncio
+
+# Local modules
+import config
+import poller
+import metrics
+import websub
+from benchmarks import mock_hub
+
+# External libraries
+import aiohttp
+import pytest
+
+CHANNEL_ID = "UCaaaaaaaaaaaaaaaaaaaaaa"
+SECRET = "shared secret"
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+async def wait_for(condition, timeout=5.0) -> None:
+    """Waits until condition() holds, the hub verifying subscriptions asynchronously."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while (not condition()):
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+async def run_with_hub(scenario) -> None:
+    """Starts the stand-in hub and the receiver subscribed to CHANNEL_ID, runs scenario(hub, entries), then stops both."""
+    hub = mock_hub.MockHub()
+    runner, hub_url = await mock_hub.start(hub)
+    config.WEBSUB_HUB_URL = f"{hub_url}/subscribe"
+    entries = []
+    async def on_entry(channel_id):
+        entries.append(channel_id)
+    try:
+        await websub.start(on_entry, [CHANNEL_ID])
+        await wait_for(lambda: websub.is_subscribed(CHANNEL_ID))
+        await scenario(hub, entries)
+    finally:
+        for task in (websub.RENEW_TASK, websub.SUBSCRIBE_TASK):
+            if (task is not None):
+                task.cancel()
+        if (websub.RUNNER is not None):
+            await websub.RUNNER.cleanup()
+        websub.RUNNER = None
+        await poller.close_session()
+        await runner.cleanup()
+
+@pytest.fixture(autouse=True)
+def receiver(monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(config, "WEBSUB_HOST", "127.0.0.1")
+    monkeypatch.setattr(config, "WEBSUB_PORT", port)
+    monkeypatch.setattr(config, "WEBSUB_CALLBACK_URL", f"http://127.0.0.1:{port}{websub.CALLBACK_PATH}")
+    monkeypatch.setattr(config, "WEBSUB_HUB_URL", config.WEBSUB_HUB_URL) # Restored after run_with_hub points it at the hub
+    monkeypatch.setattr(config, "WEBSUB_SECRET", SECRET)
+    websub.LEASES.clear()
+    websub.PENDING.clear()
+    yield
+
+def test_subscribe_verify_publish_calls_on_entry():
+    async def scenario(hub, entries):
+        assert await hub.publish(CHANNEL_ID) == 1
+        assert entries == [CHANNEL_ID]
+    asyncio.run(run_with_hub(scenario))
+
+def test_wrong_signature_is_rejected():
+    async def scenario(hub, entries):
+        rejected = metrics.COUNTERS.get(metrics.key('websub_rejected', {}), 0)
+        body = mock_hub.FEED_ENTRY.format(topic=websub.topic(CHANNEL_ID), video_id="video", channel_id=CHANNEL_ID)
+        async with aiohttp.ClientSession() as session:
+            headers = {'X-Hub-Signature': 'sha1=' + '0' * 40}
+            async with session.post(config.WEBSUB_CALLBACK_URL, data=body.encode(), headers=headers) as response:
+                assert response.status == 202
+        assert entries == []
+        assert metrics.COUNTERS.get(metrics.key('websub_rejected', {}), 0) == rejected + 1
+    asyncio.run(run_with_hub(scenario))
+
+def test_unsubscribe_drops_the_subscription():
+    async def scenario(hub, entries):
+        await websub.unsubscribe(CHANNEL_ID)
+        assert not websub.is_subscribed(CHANNEL_ID)
+        await wait_for(lambda: len(hub.subscriptions) < 1)
+        assert await hub.publish(CHANNEL_ID) == 0
+        assert entries == []
+    asyncio.run(run_with_hub(scenario))
@@ -0,0 +1,78 @@
+# transitions.py
+# Confirmation of online/offline transitions.
+# A status differing from the confirmed one only becomes a transition once it is seen in enough consecutive checks,
+# the extra checks being scheduled CONFIRM_DELAY seconds apart instead of waiting for the channel's next regular check.
+# Python libraries
+import time
+
+# Local module
+import config
+
+STATES = {} # (platform, name) -> ChannelState of channels with a pending or recent transition
+
+class ChannelState:
+    """Transition being confirmed for a channel, and when it last went offline."""
+
+    def __init__(self):
+        self.candidate = None   # Status seen differing from the confirmed one
+        self.samples = 0        # Consecutive checks that saw the candidate status
+        self.offline_at = None  # time.time() of the last confirmed offline transition
+        self.first_seen = None  # time.time() of the first check that saw the candidate status
+        self.last_seen = None   # time.time() of the last check that still saw the confirmed status
+
+def required(is_live) -> int:
+    """Consecutive checks needed to confirm a change to given status."""
+    return max(config.LIVE_CONFIRMATIONS if is_live else config.OFFLINE_CONFIRMATIONS, 1)
+
+def observe(key, confirmed, is_live, last_check=None) -> str:
+    """
+    Feeds the status found by a check of a channel whose confirmed status is given,
+    last_check being the time.time() at which the previous check of the channel finished.
+    Returns 'live' or 'offline' when the change is confirmed, 'resumed' when a channel confirmed
+    offline less than RENOTIFY_AFTER seconds ago is live again, 'pending' while a change awaits
+    confirmation, and None when the status didn't change.
+    """
+    state = STATES.get(key)
+    if (is_live == confirmed):
+        if (state is not None):
+            state.candidate, state.samples = None, 0 # Flapped back before being confirmed
+        return None
+    if (state is None):
+        state = STATES[key] = ChannelState()
+    if (state.candidate != is_live):
+        state.candidate, state.samples = is_live, 0
+        state.first_seen, state.last_seen = time.time(), last_check
+    state.samples += 1
+    if (state.samples < required(is_live)):
+        return 'pending'
+    state.candidate, state.samples = None, 0
+    now = time.time()
+    if (not is_live):
+        state.offline_at = now
+        return 'offline'
+    if (state.offline_at is not None and now - state.offline_at < config.RENOTIFY_AFTER):
+        return 'resumed'
+    return 'live'
+
+def pending(key) -> bool:
+    """Whether a change of the channel awaits confirmation."""
+    state = STATES.get(key)
+    return state is not None and state.candidate is not None
+
+def timing(key) -> (float, float):
+    """
+    Returns when the last change of a channel was first seen, and when the check before it finished,
+    the change having happened in between. Either may be None.
+    """
+    state = STATES.get(key)
+    return (state.first_seen, state.last_seen) if state is not None else (None, None)
+
+def forget(key) -> None:
+    STATES.pop(key, None)
+
+def prune() -> None:
+    """Forgets channels with nothing pending that went offline long enough ago."""
+    now = time.time()
+    for key in [key for key, state in STATES.items() if state.candidate is None and
+                (state.offline_at is None or now - state.offline_at >= config.RENOTIFY_AFTER)]:
+        del STATES[key]
@@ -0,0 +1,94 @@
+# twitch_helix.py
+# Twitch live status through the Helix API: up to 100 channels per request instead of one page per channel.
+# Python libraries
+import time
+import asyncio
+
+# Local modules
+import config
+import poller
+import metrics
+
+# External libraries
+import aiohttp
+
+BATCH_SIZE = 100        # Logins accepted by a single 'streams' request
+TOKEN_MARGIN = 60       # Seconds before expiry at which the app access token is renewed
+
+TOKEN = None
+TOKEN_EXPIRES = 0.0
+
+class HelixError(Exception):
+    """Raised when the Helix API can't be used, so callers fall back to scraping."""
+
+def enabled() -> bool:
+    """Whether Helix credentials are configured."""
+    return bool(config.TWITCH_CLIENT_ID) and bool(config.TWITCH_CLIENT_SECRET)
+
+async def get_token() -> str:
+    """Returns the cached app access token, requesting a new one when it is about to expire."""
+    global TOKEN, TOKEN_EXPIRES
+    if (TOKEN is not None and time.monotonic() < TOKEN_EXPIRES):
+        return TOKEN
+    session = await poller.get_session()
+    parameters = {
+        'client_id': config.TWITCH_CLIENT_ID,
+        'client_secret': config.TWITCH_CLIENT_SECRET,
+        'grant_type': 'client_credentials'}
+    async with session.post(config.TWITCH_AUTH_URL, params=parameters) as response:
+        if (response.status != 200):
+            raise HelixError(f"Token request failed with status {response.status}")
+        data = await response.json()
+    if (not isinstance(data, dict) or not isinstance(data.get('access_token'), str)):
+        raise HelixError("Token response holds no access token")
+    TOKEN = data['access_token']
+    TOKEN_EXPIRES = time.monotonic() + data.get('expires_in', 3600) - TOKEN_MARGIN
+    return TOKEN
+
+def forget_token() -> None:
+    global TOKEN
+    TOKEN = None
+
+async def request_streams(logins) -> list:
+    """Requests the live streams among at most BATCH_SIZE logins, renewing the token once if it was revoked."""
+    session = await poller.get_session()
+    parameters = [('user_login', login) for login in logins] + [('first', str(BATCH_SIZE))]
+    for attempt in range(2):
+        headers = {'Client-Id': config.TWITCH_CLIENT_ID, 'Authorization': f"Bearer {await get_token()}"}
+        start = time.perf_counter()
+        async with session.get(f"{config.TWITCH_API_URL}/streams", params=parameters, headers=headers) as response:
+            metrics.observe('fetch_seconds', time.perf_counter() - start, platform='Twitch Helix')
+            if (response.status == 401 and attempt == 0):
+                forget_token()
+                continue
+            if (response.status != 200):
+                raise HelixError(f"Streams request failed with status {response.status}")
+            body = await response.read()
+            metrics.inc('downloaded_bytes', len(body), platform='Twitch Helix')
+            data = await response.json()
+            if (not isinstance(data, dict) or not isinstance(data.get('data', []), list)):
+                raise HelixError("Malformed streams response")
+            return data.get('data', [])
+    raise HelixError("Streams request unauthorized")
+
+async def get_live_streams(logins) -> {str: str}:
+    """
+    Maps the lowercase login of every live channel among logins to its stream title.
+    The API has its own circuit breaker, so page scraping takes over right away while it is failing.
+    """
+    breaker = poller.get_breaker('Twitch Helix')
+    if (not breaker.allow()):
+        raise HelixError("Helix requests are paused")
+    live = {}
+    logins = [login.lower() for login in logins]
+    for index in range(0, len(logins), BATCH_SIZE):
+        try:
+            streams = await request_streams(logins[index:index + BATCH_SIZE])
+        except (aiohttp.ClientError, asyncio.TimeoutError, HelixError, ValueError) as e: # ValueError: body isn't JSON
+            breaker.failure()
+            raise HelixError(repr(e)) from e
+        breaker.success()
+        for stream in streams:
+            if (isinstance(stream, dict) and stream.get('type') == 'live' and isinstance(stream.get('user_login'), str)):
+                live[stream['user_login'].lower()] = stream.get('title') or ''
+    return live
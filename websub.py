@@ -0,0 +1,186 @@
+# websub.py
+# Receives YouTube feed updates through WebSub, so new videos and streams are checked right away
+# instead of waiting for the next poll.
+# Python libraries
+import hmac
+import time
+import asyncio
+import urllib.parse
+import xml.etree.ElementTree as ElementTree
+
+# Local modules
+import config
+import poller
+import metrics
+
+# External libraries
+import aiohttp
+from aiohttp import web
+
+TOPIC_URL = 'https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}'
+CALLBACK_PATH = '/websub'
+RENEW_MARGIN = 86400    # Seconds before a lease expires at which it is renewed
+RENEW_PERIOD = 3600     # Seconds between lease checks
+PENDING_RETRY = 3600    # Seconds after which an unverified subscription is requested again
+HUB_CONCURRENCY = 10    # Subscription requests sent to the hub at once
+NAMESPACES = {'atom': 'http://www.w3.org/2005/Atom', 'yt': 'http://www.youtube.com/xml/schemas/2015'}
+
+LEASES = {}     # YouTube channel id -> time.time() at which its lease expires
+PENDING = {}    # YouTube channel id -> time.time() at which a subscription was requested
+ON_ENTRY = None # Coroutine function called with the channel id of every new feed entry
+RUNNER = None
+RENEW_TASK = None
+SUBSCRIBE_TASK = None
+
+def enabled() -> bool:
+    return bool(config.WEBSUB_CALLBACK_URL)
+
+def receiving() -> bool:
+    """Whether this process runs the receiver, which worker processes never do."""
+    return RUNNER is not None
+
+def topic(channel_id) -> str:
+    return TOPIC_URL.format(channel_id=channel_id)
+
+def channel_id_from_topic(topic_url) -> str:
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(topic_url).query)
+    return query.get('channel_id', [None])[0]
+
+def is_subscribed(channel_id) -> bool:
+    """Whether the hub confirmed an active lease for the channel's feed."""
+    return LEASES.get(channel_id, 0) > time.time()
+
+async def request_subscription(channel_id, mode='subscribe') -> None:
+    """Asks the hub to (un)subscribe the receiver to a channel's feed. The hub confirms asynchronously."""
+    data = {
+        'hub.callback': config.WEBSUB_CALLBACK_URL,
+        'hub.topic': topic(channel_id),
+        'hub.mode': mode,
+        'hub.verify': 'async',
+        'hub.lease_seconds': str(config.WEBSUB_LEASE)}
+    if (config.WEBSUB_SECRET):
+        data['hub.secret'] = config.WEBSUB_SECRET
+    if (mode == 'subscribe'):
+        PENDING[channel_id] = time.time()
+    else:
+        PENDING.pop(channel_id, None)
+        LEASES.pop(channel_id, None)
+    session = await poller.get_session()
+    try:
+        async with session.post(config.WEBSUB_HUB_URL, data=data) as response:
+            metrics.inc('websub_requests')
+            if (response.status not in (202, 204)):
+                print(f"WebSub {mode} of {channel_id} failed with status {response.status}")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"WebSub {mode} of {channel_id} failed: {e!r}")
+
+async def subscribe(channel_id) -> None:
+    """
+    Subscribes to a channel's feed, unless a lease is active or a request is on its way.
+    Nothing is requested by a process that doesn't receive notifications itself.
+    """
+    if (not receiving() or channel_id is None or is_subscribed(channel_id)):
+        return
+    if (time.time() - PENDING.get(channel_id, 0) < PENDING_RETRY):
+        return
+    await request_subscription(channel_id)
+
+async def subscribe_all(channel_ids, request=subscribe) -> None:
+    """Sends the (re)subscriptions of many channels concurrently, at most HUB_CONCURRENCY at a time."""
+    semaphore = asyncio.Semaphore(HUB_CONCURRENCY)
+    async def bounded(channel_id):
+        async with semaphore:
+            await request(channel_id)
+    await asyncio.gather(*[bounded(channel_id) for channel_id in channel_ids])
+
+async def unsubscribe(channel_id) -> None:
+    if (receiving() and channel_id is not None and (channel_id in LEASES or channel_id in PENDING)):
+        await request_subscription(channel_id, mode='unsubscribe')
+
+async def handle_verification(request) -> web.Response:
+    """Confirms (un)subscriptions the receiver asked for by echoing the hub's challenge."""
+    query = request.query
+    mode = query.get('hub.mode')
+    channel_id = channel_id_from_topic(query.get('hub.topic', ''))
+    if (mode == 'denied'):
+        print(f"WebSub subscription to {channel_id} denied: {query.get('hub.reason')}")
+        PENDING.pop(channel_id, None)
+        return web.Response(text='')
+    if (mode == 'subscribe' and channel_id in PENDING):
+        lease = int(query.get('hub.lease_seconds', config.WEBSUB_LEASE))
+        LEASES[channel_id] = time.time() + lease
+        del PENDING[channel_id]
+        metrics.inc('websub_verified')
+        return web.Response(text=query.get('hub.challenge', ''))
+    if (mode == 'unsubscribe' and channel_id not in LEASES and channel_id not in PENDING):
+        return web.Response(text=query.get('hub.challenge', ''))
+    return web.Response(status=404) # Not something this receiver asked for
+
+def valid_signature(body, header) -> bool:
+    """Checks the X-Hub-Signature of a notification against the shared secret."""
+    if (not config.WEBSUB_SECRET):
+        return True
+    algorithm, _, signature = (header or '').partition('=')
+    if (algorithm not in ('sha1', 'sha256', 'sha384', 'sha512')):
+        return False
+    expected = hmac.new(config.WEBSUB_SECRET.encode(), body, algorithm).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def parse_feed(body) -> [str]:
+    """Returns the channel id of every video or stream entry of an Atom notification."""
+    try:
+        root = ElementTree.fromstring(body)
+    except ElementTree.ParseError:
+        return []
+    channel_ids = []
+    for entry in root.findall('atom:entry', NAMESPACES):
+        channel_id = entry.findtext('yt:channelId', namespaces=NAMESPACES)
+        if (channel_id is not None and channel_id not in channel_ids):
+            channel_ids.append(channel_id)
+    return channel_ids
+
+async def handle_notification(request) -> web.Response:
+    """Triggers a check of every channel that published or updated an entry."""
+    body = await request.read()
+    if (not valid_signature(body, request.headers.get('X-Hub-Signature'))):
+        metrics.inc('websub_rejected')
+        return web.Response(status=202) # Hubs must not learn whether the signature matched
+    metrics.inc('websub_notifications')
+    for channel_id in parse_feed(body):
+        if (ON_ENTRY is not None and is_subscribed(channel_id)):
+            await ON_ENTRY(channel_id)
+    return web.Response(status=204)
+
+async def renew_leases() -> None:
+    """Renews leases close to expiring, and retries subscriptions the hub never verified."""
+    while (True):
+        await asyncio.sleep(RENEW_PERIOD)
+        now = time.time()
+        expiring = [channel_id for channel_id, expires in LEASES.items() if expires - now < RENEW_MARGIN]
+        stale = [channel_id for channel_id, requested in PENDING.items() if now - requested >= PENDING_RETRY]
+        await subscribe_all(expiring + stale, request_subscription)
+
+async def start(on_entry, channel_ids) -> None:
+    """
+    Starts the receiver and subscribes to the given channels' feeds in the background, unless disabled or already running.
+    A port that can't be bound only disables the receiver, leaving channels to polling.
+    """
+    global ON_ENTRY, RUNNER, RENEW_TASK, SUBSCRIBE_TASK
+    if (not enabled() or RUNNER is not None):
+        return
+    ON_ENTRY = on_entry
+    app = web.Application()
+    app.router.add_get(CALLBACK_PATH, handle_verification)
+    app.router.add_post(CALLBACK_PATH, handle_notification)
+    RUNNER = web.AppRunner(app)
+    await RUNNER.setup()
+    try:
+        await web.TCPSite(RUNNER, config.WEBSUB_HOST, config.WEBSUB_PORT).start()
+    except OSError as e:
+        print(f"Couldn't receive WebSub notifications on port {config.WEBSUB_PORT}: {e}")
+        await RUNNER.cleanup()
+        RUNNER = None
+        return
+    print(f"Receiving WebSub notifications on port {config.WEBSUB_PORT}")
+    RENEW_TASK = asyncio.create_task(renew_leases())
+    SUBSCRIBE_TASK = asyncio.create_task(subscribe_all(list(channel_ids)))
@@ -0,0 +1,76 @@
+# worker.py
+# Standalone poller worker. Several workers, as processes or on separate hosts sharing the database file,
+# split the channels between them through shard leases and record the state changes they detect,
+# which a single bot started with POLLER_MODE=notifier turns into Discord notices.
+# Python libraries
+import time
+import asyncio
+
+# Local modules
+import config
+import poller
+import metrics
+import monitor
+import history
+import sharding
+import channel_store
+import response_cache
+import async_database
+
+async def on_channel_change(row, kind, title, url) -> None:
+    """Records a transition in the database along with the cycle's other changes, for the notifier."""
+    channel_store.queue_event(row[0], kind, title, url)
+
+def sync_schedule() -> None:
+    """Schedules the channels of the shards leased to this worker, and drops the others."""
+    owned = {(row[2], row[1]): row for row in channel_store.get_channels() if sharding.owns((row[2], row[1]))}
+    for key in list(monitor.SCHEDULER.entries):
+        if (key not in owned):
+            monitor.SCHEDULER.remove(key)
+            response_cache.forget(key)
+    for key, row in owned.items():
+        if (key not in monitor.SCHEDULER.entries):
+            monitor.schedule(row) # Resumes from the state saved by whichever worker checked it last
+
+async def run() -> None:
+    await async_database.start()
+    await channel_store.load()
+    await monitor.load_state()
+    await history.load_starts()
+    await metrics.start(config.WORKER_METRICS_PORT)
+    monitor.ON_CHANGE = on_channel_change
+    print(f"Worker {config.WORKER_ID} polling {len(channel_store.BY_ID)} channel(s) split in {config.SHARDS} shards.")
+    next_reload = time.monotonic() + config.CHANNEL_RELOAD
+    next_lease = 0.0
+    try:
+        while (True):
+            now = time.monotonic()
+            if (now >= next_reload):
+                await channel_store.flush()
+                await channel_store.load() # Picks up channels added or removed through the bot
+                await monitor.save_state()
+                await monitor.load_state()
+                sync_schedule()
+                next_reload = now + config.CHANNEL_RELOAD
+            if (now >= next_lease):
+                owned = len(sharding.OWNED)
+                await sharding.rebalance()
+                if (len(sharding.OWNED) != owned):
+                    print(f"Holding {len(sharding.OWNED)} of {config.SHARDS} shard(s).")
+                next_lease = now + config.LEASE_RENEW
+                sync_schedule() # Leases are renewed well before they expire, so ownership only changes here
+            await monitor.run_due()
+            await asyncio.sleep(config.SCHEDULER_TICK)
+    finally:
+        await monitor.wait_checks()
+        await channel_store.flush()
+        await monitor.save_state()
+        await sharding.leave()
+        await poller.close_session()
+        await async_database.stop()
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass